@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from batch_runner import hatch_job, run_jobs
+from disk_cache import CACHE_ROOT, sha256_bytes
+from pages.convert_pdf import ProcessStats, default_output_cache, output_cache_keys, output_name
+from zip_spool import unique_arcname
+
+# ------------------------------------------------
+#  KALICI / DEVAM ETTİRİLEBİLİR BATCH İŞLERİ
+# ------------------------------------------------
+# Her batch bir iş dizinidir:
+#   jobs/<job_id>/manifest.json   → dosyalar, ayarlar, biten/hatalı (hash, ayar) çiftleri
+#   jobs/<job_id>/inputs/<hash>.pdf
+#   jobs/<job_id>/outputs/<hash>-<aci>_<yon>.pdf
+#   jobs/<job_id>/outputs.zip     → iş bitince bir kez yazılan indirme arşivi
+# İşi sayfa değil, sunucu sürecindeki bir arka plan iş parçacığı yürütür; Streamlit
+# rerun'ı (sekme değişimi, widget, yeniden bağlanma) işi kesmez, sayfa aynı job_id
+# ile yeniden bağlanır. Sunucu yeniden başlarsa manifest'te bitmiş çiftler atlanır.
+
+JOBS_ROOT = CACHE_ROOT / "jobs"
+JOB_TTL_S = float(os.environ.get("BATCH_JOB_TTL_H", 72)) * 3600
+
+_RUNNERS: Dict[str, threading.Thread] = {}
+_RUNNERS_LOCK = threading.Lock()
+
+
+def config_key(cfg: dict) -> str:
+    return f"{cfg['TARAMA_ACISI_DERECE']:g}:{cfg['yon']}"
+
+
+def output_rel(h: str, cfg: dict) -> str:
+    # Çıktı dosyası (hash, açı, yon) çiftine özgüdür; aynı yon'lu iki ayar çakışmaz
+    return f"outputs/{h}-{config_key(cfg).replace(':', '_')}.pdf"
+
+
+def _write_bytes(path: Path, data: bytes) -> None:
+    # Atomik yazma: okuyan taraf hiçbir zaman yarım dosya görmez
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _write_json(path: Path, obj) -> None:
+    _write_bytes(path, json.dumps(obj, ensure_ascii=False, indent=1).encode("utf-8"))
+
+
+def cleanup_jobs(max_age_s: float = JOB_TTL_S) -> int:
+    # Çalışmayan ve süresi dolmuş iş dizinlerini sil
+    if not JOBS_ROOT.exists():
+        return 0
+    now = time.time()
+    removed = 0
+    for d in JOBS_ROOT.iterdir():
+        manifest = d / "manifest.json"
+        try:
+            age = now - manifest.stat().st_mtime
+        except FileNotFoundError:
+            age = now - d.stat().st_mtime
+        with _RUNNERS_LOCK:
+            running = d.name in _RUNNERS and _RUNNERS[d.name].is_alive()
+        if age > max_age_s and not running:
+            shutil.rmtree(d, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+class BatchJob:
+    """Diskteki bir batch işi; aynı job_id ile her rerun'da yeniden açılabilir."""
+
+    def __init__(self, job_dir: Path):
+        self.dir = Path(job_dir)
+        self.job_id = self.dir.name
+        self.manifest = json.loads((self.dir / "manifest.json").read_text(encoding="utf-8"))
+
+    # ---------- oluşturma / açma ----------
+
+    @classmethod
+    def create(
+        cls,
+        files: List[Tuple[str, bytes]],
+        configs: List[dict],
+        params: dict,
+        hashes: Optional[List[str]] = None,
+    ) -> "BatchJob":
+        """Aynı dosya + ayar kümesi için aynı job_id üretilir; iş zaten varsa kaldığı yerden devam eder.
+
+        hashes verilirse (yüklemede bir kez hesaplanmış içerik hash'leri) yeniden hesaplanmaz.
+        """
+        if hashes is None:
+            hashes = [sha256_bytes(data) for _, data in files]
+        entries = [{"name": name, "hash": h} for (name, _), h in zip(files, hashes)]
+        ident = json.dumps(
+            {"files": entries, "configs": [config_key(c) for c in configs], "params": params},
+            sort_keys=True,
+        )
+        job_id = hashlib.sha256(ident.encode("utf-8")).hexdigest()[:20]
+        job_dir = JOBS_ROOT / job_id
+        if (job_dir / "manifest.json").exists():
+            return cls(job_dir)
+
+        (job_dir / "inputs").mkdir(parents=True, exist_ok=True)
+        (job_dir / "outputs").mkdir(exist_ok=True)
+        for entry, (_, data) in zip(entries, files):
+            path = job_dir / "inputs" / f"{entry['hash']}.pdf"
+            if not path.exists():
+                path.write_bytes(data)
+        _write_json(job_dir / "manifest.json", {
+            "job_id": job_id,
+            "created": time.time(),
+            "files": entries,
+            "configs": configs,
+            "params": params,
+            "done": {},     # "hash|aci:yon" → çıktı dosyası (outputs/ altında)
+            "failed": {},   # "hash|aci:yon" → hata mesajı
+            "stats": {},    # hash → ProcessStats.as_row()
+        })
+        return cls(job_dir)
+
+    @classmethod
+    def open(cls, job_id: str) -> Optional["BatchJob"]:
+        job_dir = JOBS_ROOT / job_id
+        if not (job_dir / "manifest.json").exists():
+            return None
+        return cls(job_dir)
+
+    def reload(self) -> "BatchJob":
+        self.manifest = json.loads((self.dir / "manifest.json").read_text(encoding="utf-8"))
+        return self
+
+    # ---------- durum ----------
+
+    @property
+    def configs(self) -> List[dict]:
+        return self.manifest["configs"]
+
+    def _pair(self, h: str, cfg: dict) -> str:
+        return f"{h}|{config_key(cfg)}"
+
+    def pending(self) -> List[Tuple[str, str, List[dict]]]:
+        """(hash, ad, eksik ayarlar); aynı içerik birden çok yüklendiyse bir kez işlenir."""
+        out, seen = [], set()
+        m = self.manifest
+        for entry in m["files"]:
+            h = entry["hash"]
+            if h in seen:
+                continue
+            seen.add(h)
+            missing = [c for c in self.configs if self._pair(h, c) not in m["done"] and self._pair(h, c) not in m["failed"]]
+            if missing:
+                out.append((h, entry["name"], missing))
+        return out
+
+    def progress(self) -> Tuple[int, int, int]:
+        # (başarılı, hatalı, toplam) — yüklenen her dosya × her ayar
+        m = self.manifest
+        ok = fail = 0
+        for entry in m["files"]:
+            for cfg in self.configs:
+                key = self._pair(entry["hash"], cfg)
+                ok += key in m["done"]
+                fail += key in m["failed"]
+        return ok, fail, len(m["files"]) * len(self.configs)
+
+    def failures(self) -> List[Tuple[str, dict, str]]:
+        m = self.manifest
+        return [
+            (entry["name"], cfg, m["failed"][self._pair(entry["hash"], cfg)])
+            for entry in m["files"]
+            for cfg in self.configs
+            if self._pair(entry["hash"], cfg) in m["failed"]
+        ]
+
+    def stats_rows(self) -> List[dict]:
+        m = self.manifest
+        return [{"dosya": e["name"], **m["stats"][e["hash"]]} for e in m["files"] if e["hash"] in m["stats"]]
+
+    def outputs(self):
+        # (ZIP içi ad, çıktı yolu) — yükleme sırasıyla. Ayarlar aynı yon'u paylaşıyorsa
+        # ada açı da eklenir ("ad-45_1.pdf"). Aynı ad + aynı çıktı bir kez verilir;
+        # aynı ada düşen farklı çıktılar (farklı klasörden aynı ad) "ad_2.pdf" gibi numaralanır
+        m = self.manifest
+        yons = [cfg["yon"] for cfg in self.configs]
+        shared_yon = len(set(yons)) != len(yons)
+        seen, taken = set(), set()
+        for entry in m["files"]:
+            for cfg in self.configs:
+                rel = m["done"].get(self._pair(entry["hash"], cfg))
+                if not rel:
+                    continue
+                tag = config_key(cfg).replace(":", "_") if shared_yon else cfg["yon"]
+                name = output_name(entry["name"], tag)
+                if (name, rel) in seen:
+                    continue
+                seen.add((name, rel))
+                yield unique_arcname(name, taken), self.dir / rel
+
+    @property
+    def archive_path(self) -> Path:
+        return self.dir / "outputs.zip"
+
+    def archive(self, compresslevel: Optional[int] = None) -> Optional[Path]:
+        """Bitmiş işin ZIP'i; yoksa bir kez yazılır, sonraki rerun'larda aynı dosya verilir.
+
+        İş çalışıyorsa None. compresslevel=None → ZIP_STORED (PDF'ler zaten sıkıştırılmış).
+        """
+        if self.is_running():
+            return None
+        path = self.archive_path
+        if not path.exists():
+            compression = zipfile.ZIP_STORED if compresslevel is None else zipfile.ZIP_DEFLATED
+            fd, tmp = tempfile.mkstemp(dir=self.dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f, zipfile.ZipFile(f, "w", compression=compression, compresslevel=compresslevel) as zf:
+                    for arcname, out_path in self.outputs():
+                        zf.write(out_path, arcname)
+                os.replace(tmp, path)
+            except BaseException:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+                raise
+        return path
+
+    def is_running(self) -> bool:
+        with _RUNNERS_LOCK:
+            t = _RUNNERS.get(self.job_id)
+            return t is not None and t.is_alive()
+
+    def retry_failed(self) -> None:
+        if self.is_running():
+            return
+        self.reload()
+        self.manifest["failed"] = {}
+        _write_json(self.dir / "manifest.json", self.manifest)
+        self.archive_path.unlink(missing_ok=True)
+
+    # ---------- yürütme ----------
+
+    def start(self, max_workers: int = 2, timeout: Optional[float] = None, memory_mb: Optional[int] = None) -> bool:
+        """Eksik çiftler için arka plan yürütücüsünü başlatır; zaten çalışıyorsa dokunmaz."""
+        with _RUNNERS_LOCK:
+            t = _RUNNERS.get(self.job_id)
+            if t is not None and t.is_alive():
+                return False
+            if not self.reload().pending():
+                return False
+            t = threading.Thread(
+                target=self._run, args=(max_workers, timeout, memory_mb),
+                name=f"batch-{self.job_id}", daemon=True,
+            )
+            _RUNNERS[self.job_id] = t
+            t.start()
+            return True
+
+    def _run(self, max_workers, timeout, memory_mb) -> None:
+        # Yeni çıktılar eklenecek: eski arşiv geçersiz
+        self.archive_path.unlink(missing_ok=True)
+        params = self.manifest["params"]
+        pending = self._take_cached(self.pending(), params)
+        jobs = [(h, (str(self.dir / "inputs" / f"{h}.pdf"), name, missing, params, h)) for h, name, missing in pending]
+        missing_by_hash = {h: missing for h, _, missing in pending}
+        for res in run_jobs(jobs, _convert_input, max_workers=max_workers, timeout=timeout, memory_mb=memory_mb):
+            h = res.key
+            missing = missing_by_hash[h]
+            m = self.manifest
+            if res.ok:
+                # Önce çıktı dosyaları, sonra manifest: yarım kalan çift manifest'te görünmez
+                for cfg, data in zip(missing, res.value["outputs"]):
+                    rel = output_rel(h, cfg)
+                    _write_bytes(self.dir / rel, data)
+                    m["done"][self._pair(h, cfg)] = rel
+                m["stats"][h] = res.value["stats"]
+            else:
+                for cfg in missing:
+                    m["failed"][self._pair(h, cfg)] = res.error
+            _write_json(self.dir / "manifest.json", m)
+        self.manifest["finished"] = time.time()
+        _write_json(self.dir / "manifest.json", self.manifest)
+
+    def _take_cached(self, pending, params):
+        # Çıktı önbelleğinde tamamı bulunan dosyalar süreç açılmadan işaretlenir
+        cache = default_output_cache()
+        m = self.manifest
+        rest = []
+        for h, name, missing in pending:
+            datas = [cache.get(k) for k in output_cache_keys(h, missing, **params)]
+            if any(d is None for d in datas):
+                rest.append((h, name, missing))
+                continue
+            for cfg, data in zip(missing, datas):
+                rel = output_rel(h, cfg)
+                _write_bytes(self.dir / rel, data)
+                m["done"][self._pair(h, cfg)] = rel
+            m["stats"].setdefault(h, ProcessStats(output_cache_hits=len(missing)).as_row())
+        if len(rest) != len(pending):
+            _write_json(self.dir / "manifest.json", m)
+        return rest
+
+
+def _convert_input(path: str, name: str, configs: List[dict], params: dict, pdf_hash: Optional[str] = None) -> dict:
+    # Alt süreçte: girdi iş dizininden okunur, çıktılar yalnızca bayt olarak döner
+    out = hatch_job(name, Path(path).read_bytes(), configs, params, pdf_hash)
+    return {"outputs": [data for _, data in out["outputs"]], "stats": out["stats"]}
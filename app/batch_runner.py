@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import time
+import traceback
+from dataclasses import dataclass
+from multiprocessing.connection import wait
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+from pages.convert_pdf import default_geometry_cache, default_output_cache, output_name, process_pdf_multi_bytes
+
+
+# ------------------------------------------------
+#  SINIRLI SÜREÇ HAVUZU (zaman aşımı + bellek sınırı)
+# ------------------------------------------------
+# ProcessPoolExecutor takılan tek bir işi öldüremez; burada her iş kendi
+# sürecinde çalışır, aynı anda en fazla `max_workers` süreç açıktır. Süresi
+# dolan ya da RSS'i bellek sınırını aşan süreç ana süreçteki yoklama döngüsünde
+# öldürülür ve hata olarak raporlanır; batch'in geri kalanı devam eder.
+# Süreçler fork ile değil forkserver/spawn ile açılır: run_jobs arka plan
+# iş parçacığından çağrılır ve çok iş parçacıklı süreçte fork güvenli değildir.
+
+@dataclass
+class JobResult:
+    key: Any
+    ok: bool
+    value: Any = None
+    error: Optional[str] = None
+    sure: float = 0.0
+
+
+def _mp_context():
+    # forkserver: sunucu tek iş parçacıklı temiz bir süreçtir, dönüştürücü modülü
+    # orada bir kez import edilir ve her iş ondan çatallanır; yoksa spawn
+    method = os.environ.get("BATCH_MP_START", "forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn")
+    ctx = mp.get_context(method)
+    if method == "forkserver":
+        ctx.set_forkserver_preload(["pages.convert_pdf"])
+    return ctx
+
+
+def _rss_mb(pid: int) -> Optional[float]:
+    # Linux: /proc/<pid>/status içindeki VmRSS (kB); okunamazsa None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _child(conn, target: Callable, args: tuple, memory_mb: Optional[int]):
+    try:
+        conn.send((True, target(*args)))
+    except MemoryError:
+        conn.send((False, f"Bellek sınırı aşıldı ({memory_mb} MB)"))
+    except BaseException as e:
+        conn.send((False, f"{type(e).__name__}: {e}" if str(e) else traceback.format_exc(limit=1)))
+    finally:
+        conn.close()
+
+
+def run_jobs(
+    jobs: Iterable[Tuple[Any, tuple]],
+    target: Callable,
+    max_workers: int = 2,
+    timeout: Optional[float] = None,
+    memory_mb: Optional[int] = None,
+    poll: float = 0.2,
+) -> Iterator[JobResult]:
+    """(key, args) işlerini `target(*args)` ile paralel çalıştırır; biten her iş için JobResult üretir."""
+    ctx = _mp_context()
+    pending = list(jobs)
+    pending.reverse()
+    running = {}  # conn -> (key, process, başlangıç)
+
+    try:
+        while pending or running:
+            while pending and len(running) < max(1, int(max_workers)):
+                key, args = pending.pop()
+                parent_conn, child_conn = ctx.Pipe(duplex=False)
+                proc = ctx.Process(target=_child, args=(child_conn, target, args, memory_mb), daemon=True)
+                proc.start()
+                child_conn.close()
+                running[parent_conn] = (key, proc, time.monotonic())
+
+            for conn in wait(list(running), timeout=poll):
+                key, proc, t0 = running.pop(conn)
+                try:
+                    ok, value = conn.recv()
+                except (EOFError, OSError):
+                    proc.join(1)
+                    ok, value = False, f"Süreç beklenmedik şekilde sonlandı (exitcode={proc.exitcode})"
+                finally:
+                    conn.close()
+                proc.join(5)
+                sure = time.monotonic() - t0
+                yield JobResult(key, True, value, None, sure) if ok else JobResult(key, False, None, value, sure)
+
+            if timeout or memory_mb:
+                now = time.monotonic()
+                for conn, (key, proc, t0) in list(running.items()):
+                    if timeout and now - t0 > timeout:
+                        error = f"Zaman aşımı ({timeout:.0f} sn), işlem durduruldu"
+                    elif memory_mb and (_rss_mb(proc.pid) or 0) > memory_mb:
+                        error = f"Bellek sınırı aşıldı ({memory_mb} MB)"
+                    else:
+                        continue
+                    running.pop(conn)
+                    proc.kill()
+                    proc.join(5)
+                    conn.close()
+                    yield JobResult(key, False, None, error, now - t0)
+    finally:
+        # Üretici erken bırakılırsa (ör. Streamlit rerun) açık süreçleri temizle
+        for conn, (_, proc, _) in running.items():
+            proc.kill()
+            proc.join(5)
+            conn.close()
+
+
+def hatch_job(name: str, data: bytes, configs: list, params: dict, pdf_hash: Optional[str] = None) -> dict:
+    # Alt süreçte çalışan tek dosyalık iş: tüm ayarların çıktıları + istatistik satırı
+    outs, stats = process_pdf_multi_bytes(
+        data, configs, geometry_cache=default_geometry_cache(), return_stats=True,
+        output_cache=default_output_cache(), pdf_hash=pdf_hash, **params
+    )
+    return {
+        "outputs": [(output_name(name, cfg["yon"]), out) for cfg, out in zip(configs, outs)],
+        "stats": stats.as_row(),
+    }
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+import numpy as np
+
+# ------------------------------------------------
+#  KÜBİK BEZIER DÜZLEŞTİRME
+# ------------------------------------------------
+# Eğriler (m, 4, 2) kontrol noktası dizisi olarak tek seferde açılır; bıçak izi
+# çıkarımı (convert_pdf) ve vektör kutu tespiti (pdf_boxes) ortak kullanır.
+
+# Adaptif modda tek bir eğri için üst sınır (aşırı küçük toleransa karşı)
+BEZIER_MAX_ADIM = 256
+
+
+def _bernstein(n: int) -> np.ndarray:
+    # (n+1, 4) kübik Bernstein katsayıları, t = 0..1 eşit aralıklı
+    t = np.linspace(0.0, 1.0, int(n) + 1)
+    mt = 1.0 - t
+    return np.stack([mt**3, 3 * mt**2 * t, 3 * mt * t**2, t**3], axis=1)
+
+
+def flatten_cubics(ctrl: np.ndarray, n: int = 20) -> np.ndarray:
+    """(m, 4, 2) kontrol noktası dizisini tek seferde (m, n+1, 2) noktaya açar."""
+    ctrl = np.asarray(ctrl, dtype=float).reshape(-1, 4, 2)
+    return np.einsum("tk,mkd->mtd", _bernstein(max(1, int(n))), ctrl)
+
+
+def cubic_segment_counts(ctrl: np.ndarray, tolerans: float, max_adim: int = BEZIER_MAX_ADIM) -> np.ndarray:
+    """Wang formülü: kiriş sapması `tolerans` altında kalacak en az parça sayısı.
+
+    Dar yarıçaplı eğriler daha çok, uzun ve yumuşak eğriler daha az nokta alır.
+    """
+    ctrl = np.asarray(ctrl, dtype=float).reshape(-1, 4, 2)
+    d1 = ctrl[:, 0] - 2 * ctrl[:, 1] + ctrl[:, 2]
+    d2 = ctrl[:, 1] - 2 * ctrl[:, 2] + ctrl[:, 3]
+    m = np.maximum(np.hypot(d1[:, 0], d1[:, 1]), np.hypot(d2[:, 0], d2[:, 1]))
+    n = np.ceil(np.sqrt(0.75 * m / max(float(tolerans), 1e-9)))
+    return np.clip(n, 1, int(max_adim)).astype(int)
+
+
+def flatten_cubics_adaptive(ctrl: np.ndarray, tolerans: float, max_adim: int = BEZIER_MAX_ADIM) -> List[np.ndarray]:
+    """Her eğri için toleransa göre parça sayısı seçer; aynı sayıdakiler birlikte hesaplanır."""
+    ctrl = np.asarray(ctrl, dtype=float).reshape(-1, 4, 2)
+    counts = cubic_segment_counts(ctrl, tolerans, max_adim)
+    out: List[Optional[np.ndarray]] = [None] * len(ctrl)
+    for n in np.unique(counts):
+        idx = np.nonzero(counts == n)[0]
+        pts = flatten_cubics(ctrl[idx], n=int(n))
+        for j, i in enumerate(idx):
+            out[i] = pts[j]
+    return out
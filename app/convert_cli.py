@@ -0,0 +1,197 @@
+"""Streamlit olmadan toplu PDF tarama (hatch) dönüşümü.
+
+Örnekler (repo kökünden):
+    python app/convert_cli.py "girdi/*.pdf" -o cikti/
+    python app/convert_cli.py girdi/ --config 45:2 --config 135:1 --workers 8 --zip cikti/hepsi.zip
+    python app/convert_cli.py girdi/ -o cikti/ --stats-json cikti/stats.json
+    python app/convert_cli.py montaj.pdf -o cikti/ --tum-sayfalar --sekil-basina
+    python app/convert_cli.py girdi/ -o cikti/ --format pdf svg dxf
+
+Her dosya ayrı bir süreçte işlenir (ProcessPoolExecutor); geometri dosya başına bir
+kez çıkarılır ve tüm açı/yön ayarları ondan üretilir.
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Optional
+
+from pages.convert_pdf import (
+    OUTPUT_FORMATS,
+    default_geometry_cache,
+    output_name,
+    process_pdf_multi,
+    process_pdf_multi_bytes,
+    process_pdf_pages,
+    process_pdf_pages_bytes,
+)
+from zip_spool import unique_arcname
+
+# converter.py'deki varsayılan 2 çıktı ayarı
+DEFAULT_CONFIGS = [
+    {"TARAMA_ACISI_DERECE": 45, "yon": 2},
+    {"TARAMA_ACISI_DERECE": 135, "yon": 1},
+]
+
+
+def parse_config(text: str) -> dict:
+    # "ACI:YON" → {"TARAMA_ACISI_DERECE": ACI, "yon": YON}
+    try:
+        angle, yon = text.split(":")
+        return {"TARAMA_ACISI_DERECE": float(angle), "yon": int(yon)}
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Geçersiz ayar '{text}', beklenen biçim ACI:YON (ör. 45:2)")
+
+
+def collect_inputs(patterns: List[str]) -> List[Path]:
+    # Klasör → içindeki *.pdf, glob → eşleşenler, dosya → kendisi (sıra korunur, tekrar yok)
+    found, seen = [], set()
+    for pat in patterns:
+        p = Path(pat)
+        if p.is_dir():
+            matches = sorted(p.glob("*.pdf")) + sorted(p.glob("*.PDF"))
+        elif p.is_file():
+            matches = [p]
+        else:
+            matches = [Path(m) for m in sorted(glob.glob(pat, recursive=True))]
+        for m in matches:
+            key = m.resolve()
+            if m.is_file() and key not in seen:
+                seen.add(key)
+                found.append(m)
+    return found
+
+
+def convert_one(path: str, configs: List[dict], params: dict, out_dir: Optional[str], as_bytes: bool) -> dict:
+    # İşçi süreçte çalışır; sonuç ana sürece picklable bir dict olarak döner
+    t0 = time.perf_counter()
+    cache = default_geometry_cache() if params.pop("use_cache", True) else None
+    sayfa_modu = params.pop("sayfa_modu", None)
+    try:
+        if sayfa_modu:
+            # Tüm sayfalar + ayrı şekiller; dosyalar zaten paralel işlendiği için sayfalar sırayla
+            kw = dict(per_shape=sayfa_modu == "sekil", max_workers=1, geometry_cache=cache, **params)
+            if as_bytes:
+                outputs = process_pdf_pages_bytes(Path(path).read_bytes(), configs, dosya_adi=path, **kw)
+            else:
+                outputs = [str(o) for o in process_pdf_pages(path, configs, output_dir=out_dir, **kw)]
+            return {"input": path, "ok": True, "outputs": outputs, "stats": {}, "sure": time.perf_counter() - t0}
+        if as_bytes:
+            data = Path(path).read_bytes()
+            outs, stats = process_pdf_multi_bytes(data, configs, geometry_cache=cache, return_stats=True, **params)
+            yons = [cfg["yon"] for cfg in configs]
+            # Aynı yon'u paylaşan ayarlar ZIP'te açıyla ayrılır (BatchJob.outputs ile aynı)
+            tags = [f"{cfg['TARAMA_ACISI_DERECE']:g}_{cfg['yon']}" for cfg in configs] if len(set(yons)) != len(yons) else yons
+            names = [output_name(path, tag, fmt) for tag in tags for fmt in params["formats"]]
+            outputs = list(zip(names, outs))
+        else:
+            outs, stats = process_pdf_multi(path, configs, output_dir=out_dir, geometry_cache=cache, return_stats=True, **params)
+            outputs = [str(o) for o in outs]
+        return {"input": path, "ok": True, "outputs": outputs, "stats": stats.as_row(), "sure": time.perf_counter() - t0}
+    except Exception as e:
+        return {"input": path, "ok": False, "error": f"{type(e).__name__}: {e}", "sure": time.perf_counter() - t0}
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="PDF bıçak izi tarama (hatch) — toplu, çok çekirdekli")
+    ap.add_argument("inputs", nargs="+", help="PDF dosyası, klasör ya da glob (ör. 'girdi/**/*.pdf')")
+    ap.add_argument("-o", "--out", type=Path, default=None, help="Çıktı klasörü (varsayılan: girdinin yanı)")
+    ap.add_argument("--zip", type=Path, default=None, help="Tüm çıktıları tek ZIP dosyasına yaz")
+    ap.add_argument("--config", type=parse_config, action="append", default=None,
+                    help="ACI:YON, birden çok verilebilir (varsayılan 45:2 ve 135:1)")
+    ap.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--kalinlik", type=float, default=2.83, help="hedef_kalinlik")
+    ap.add_argument("--aralik", type=int, default=6, help="tarama_araligi")
+    ap.add_argument("--bezier", type=int, default=20, help="bezier_adim")
+    ap.add_argument("--bezier-tolerans", type=float, default=None)
+    ap.add_argument("--buffer-eps", type=float, default=0.01)
+    ap.add_argument("--hafif", action="store_true", help="get_cdrawings ile hafif çıkarım")
+    ap.add_argument("--hatch-workers", type=int, default=None,
+                    help="Çok büyük bıçaklarda taramayı bu kadar şeride bölüp paralel kes")
+    ap.add_argument("--no-cache", action="store_true", help="Geometri önbelleğini kullanma")
+    ap.add_argument("--format", nargs="+", choices=OUTPUT_FORMATS, default=["pdf"], dest="formats",
+                    help="Çıktı biçimleri; hepsi aynı geometri/tarama geçişinden yazılır")
+    ap.add_argument("--tum-sayfalar", action="store_true",
+                    help="Tüm sayfaları ve sayfadaki her ayrı bıçak şeklini işle (ayar başına çok sayfalı PDF)")
+    ap.add_argument("--sekil-basina", action="store_true", help="--tum-sayfalar ile: her şekil için ayrı PDF")
+    ap.add_argument("--stats-json", type=Path, default=None, help="Dosya başına aşama istatistiklerini yaz")
+    args = ap.parse_args(argv)
+    if args.tum_sayfalar and args.formats != ["pdf"]:
+        ap.error("--tum-sayfalar yalnızca PDF çıktısı üretir")
+
+    inputs = collect_inputs(args.inputs)
+    if not inputs:
+        print("PDF bulunamadı.", file=sys.stderr)
+        return 2
+
+    configs = args.config or DEFAULT_CONFIGS
+    yons = [cfg["yon"] for cfg in configs]
+    if len(set(yons)) != len(yons) and (args.zip is None or args.tum_sayfalar):
+        ap.error("Aynı yon'u paylaşan ayarlar yalnızca --zip ile (ve --tum-sayfalar olmadan) kullanılabilir")
+    params = dict(
+        hedef_kalinlik=args.kalinlik,
+        tarama_araligi=args.aralik,
+        bezier_adim=args.bezier,
+        bezier_tolerans=args.bezier_tolerans,
+        buffer_eps=args.buffer_eps,
+        hafif_cikarim=args.hafif,
+        hatch_workers=args.hatch_workers,
+        use_cache=not args.no_cache,
+        sayfa_modu=("sekil" if args.sekil_basina else "sayfa") if args.tum_sayfalar else None,
+    )
+    if not args.tum_sayfalar:
+        params["formats"] = tuple(args.formats)
+    as_bytes = args.zip is not None
+    if args.out:
+        args.out.mkdir(parents=True, exist_ok=True)
+    if as_bytes:
+        args.zip.parent.mkdir(parents=True, exist_ok=True)
+
+    workers = max(1, min(args.workers, len(inputs)))
+    print(f"{len(inputs)} dosya × {len(configs)} ayar, {workers} işçi süreç")
+
+    t0 = time.perf_counter()
+    results = []
+    # PDF'ler zaten sıkıştırılmış: ZIP_STORED. Farklı klasörlerdeki aynı adlar numaralanır
+    zf = zipfile.ZipFile(args.zip, "w", zipfile.ZIP_STORED) if as_bytes else None
+    taken = set()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            futures = [
+                ex.submit(convert_one, str(p), configs, dict(params), str(args.out) if args.out else None, as_bytes)
+                for p in inputs
+            ]
+            for i, fut in enumerate(as_completed(futures), start=1):
+                res = fut.result()
+                name = Path(res["input"]).name
+                if res["ok"] and zf is not None:
+                    for arcname, data in res.pop("outputs"):
+                        zf.writestr(unique_arcname(arcname, taken), data)
+                    res["outputs"] = [str(args.zip)]
+                results.append(res)
+                mark = "OK " if res["ok"] else "HATA"
+                detail = f"{res['sure']:.2f}s" if res["ok"] else res["error"]
+                print(f"[{i}/{len(inputs)}] {mark} {name} {detail}", flush=True)
+    finally:
+        if zf is not None:
+            zf.close()
+
+    ok = sum(r["ok"] for r in results)
+    print(f"Tamamlandı: {ok} başarılı, {len(results) - ok} hatalı, {time.perf_counter() - t0:.1f}s")
+
+    if args.stats_json:
+        rows = [{"dosya": r["input"], **r["stats"]} if r["ok"] else {"dosya": r["input"], "hata": r["error"]} for r in results]
+        args.stats_json.write_text(json.dumps(rows, indent=2, ensure_ascii=False))
+
+    return 0 if ok == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
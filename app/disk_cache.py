@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional, Union
+
+# Varsayılan önbellek kökü; sunucuda kalıcı bir diske yönlendirmek için env ile değiştirilebilir
+CACHE_ROOT = Path(os.environ.get("GRAFIK_CACHE_DIR", Path(tempfile.gettempdir()) / "grafik_fronthand_cache"))
+
+
+def sha256_bytes(data) -> str:
+    return hashlib.sha256(memoryview(data)).hexdigest()
+
+
+def upload_hash(uf, session) -> str:
+    """Yüklenen dosyanın içerik hash'i; `session` (st.session_state ya da dict) içinde saklanır.
+
+    Hash yükleme başına bir kez hesaplanır, rerun'larda oturumdan okunur.
+    """
+    hashes = session.setdefault("upload_hashes", {})
+    key = getattr(uf, "file_id", None) or (uf.name, uf.size)
+    if key not in hashes:
+        hashes[key] = sha256_bytes(uf.getbuffer())
+    return hashes[key]
+
+
+def sha256_file(path: Union[str, Path], chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class DiskLRUCache:
+    """Boyut sınırlı, dosya tabanlı bayt önbelleği.
+
+    Her kayıt ayrı bir dosyadır; erişim zamanı mtime ile tutulur ve toplam boyut
+    `max_bytes` aşılınca en eski kullanılanlar silinir. Yazma `os.replace` ile
+    atomik olduğundan aynı dizini birden çok süreç paylaşabilir.
+    """
+
+    def __init__(self, root: Union[str, Path], max_bytes: int = 256 * 1024 * 1024, suffix: str = ".bin"):
+        self.root = Path(root)
+        self.max_bytes = int(max_bytes)
+        self.suffix = suffix
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        name = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self.root / name[:2] / f"{name}{self.suffix}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def set(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        self.evict()
+
+    def __contains__(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def evict(self) -> int:
+        entries = []
+        total = 0
+        for p in self.root.glob(f"*/*{self.suffix}"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+            total += st.st_size
+        removed = 0
+        if total <= self.max_bytes:
+            return removed
+        for _, size, p in sorted(entries, key=lambda e: e[0]):
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+            if total <= self.max_bytes:
+                break
+        return removed
+
+    def clear(self) -> None:
+        for p in self.root.glob(f"*/*{self.suffix}"):
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+import numpy as np
+import shapely
+
+
+# ------------------------------------------------
+#  TARAMA (HATCH) İÇİN SCANLINE KESİCİ
+# ------------------------------------------------
+# Poligon (delikleriyle birlikte) tarama uzayına döndürülür: u = tarama yönü,
+# v = tarama normali. Her kenar, kestiği tarama çizgileri için bir kesişim kaydı
+# üretir (kenar tablosu); kayıtlar (çizgi, u) sırasına dizilip ikişer ikişer
+# eşlenince tüm açıklıklar (span) tek geçişte çıkar. Çift-tek kuralı ve yarı açık
+# [vmin, vmax) aralığı sayesinde her çizgideki kesişim sayısı hep çifttir.
+
+
+def ring_edges(geom) -> np.ndarray:
+    """Polygon / MultiPolygon içindeki tüm halka kenarlarını (e, 2, 2) olarak döner."""
+    if geom is None or geom.is_empty:
+        return np.empty((0, 2, 2))
+    polys = shapely.get_parts(geom)
+    rings = shapely.get_rings(polys[shapely.get_type_id(polys) == 3])
+    edges = []
+    for ring in rings:
+        pts = shapely.get_coordinates(ring)
+        if len(pts) >= 2:
+            edges.append(np.stack([pts[:-1], pts[1:]], axis=1))
+    return np.concatenate(edges) if edges else np.empty((0, 2, 2))
+
+
+def scan_offsets(diag: float, step: int) -> np.ndarray:
+    # process_pdf'teki range(-int(diag), int(diag), step) ile birebir aynı
+    return np.arange(-int(diag), int(diag), int(step), dtype=float)
+
+
+def hatch_spans(
+    geom,
+    angle_deg: float,
+    step: int,
+    center: Tuple[float, float],
+    diag: float,
+) -> np.ndarray:
+    """`geom`'un dolu kısımlarını kesen tarama parçalarını (s, 2, 2) sayfa koordinatında döner.
+
+    Sıra: önce tarama çizgisi (normal boyunca), sonra tarama yönünde soldan sağa.
+    Her çizgi için `poly.intersection(LineString)` ile aynı parçaları verir.
+    """
+    edges = ring_edges(geom)
+    return spans_from_edges(edges, angle_deg, scan_offsets(diag, step), center, diag)
+
+
+def hatch_spans_tiled(
+    geom,
+    angle_deg: float,
+    step: int,
+    center: Tuple[float, float],
+    diag: float,
+    workers: int,
+    strips: Optional[int] = None,
+) -> np.ndarray:
+    """hatch_spans ile aynı sonuç; çizgiler normal boyunca ayrık şeritlere bölünüp paralel kesilir.
+
+    Şerit sınırları çizgi başına kesişim sayısına göre seçilir (iş yükü dengeli);
+    her şerit yalnızca kendi aralığına uzanan kenarları görür. Parçalar sırayla
+    birleştirildiği için çıktı sırası tek geçişle aynıdır.
+    """
+    edges = ring_edges(geom)
+    offsets = scan_offsets(diag, step)
+    strips = int(strips or workers)
+    if workers <= 1 or strips <= 1 or len(offsets) < 2 * strips or not len(edges):
+        return spans_from_edges(edges, angle_deg, offsets, center, diag)
+
+    # Çizgi başına kesişim sayısı → kümülatif iş → eşit paylı şerit sınırları
+    k_lo, k_hi = edge_line_ranges(edges, angle_deg, offsets, center)
+    work = np.zeros(len(offsets) + 1)
+    np.add.at(work, k_lo, 1)
+    np.add.at(work, k_hi, -1)
+    cum = np.cumsum(np.cumsum(work)[:-1] + 1)  # +1: boş çizgiler de sayılsın
+    cuts = np.searchsorted(cum, cum[-1] * np.arange(1, strips) / strips)
+    bounds = np.unique(np.r_[0, cuts, len(offsets)])
+
+    def run(i):
+        lo, hi = bounds[i], bounds[i + 1]
+        sel = (k_hi > lo) & (k_lo < hi)
+        return spans_from_edges(edges[sel], angle_deg, offsets[lo:hi], center, diag)
+
+    with ThreadPoolExecutor(max_workers=int(workers)) as ex:
+        parts = list(ex.map(run, range(len(bounds) - 1)))
+    return np.concatenate(parts)
+
+
+def edge_line_ranges(
+    edges: np.ndarray,
+    angle_deg: float,
+    offsets: np.ndarray,
+    center: Tuple[float, float],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Her kenarın kestiği tarama çizgileri: offsets[k_lo:k_hi] (yarı açık [vmin, vmax) kuralıyla)."""
+    angle_rad = math.radians(float(angle_deg))
+    nx, ny = -math.sin(angle_rad), math.cos(angle_rad)
+    v = (edges[..., 0] - float(center[0])) * nx + (edges[..., 1] - float(center[1])) * ny
+    k_lo = np.searchsorted(offsets, v.min(axis=1), side="left")
+    k_hi = np.searchsorted(offsets, v.max(axis=1), side="left")
+    return k_lo, k_hi
+
+
+def spans_from_edges(
+    edges: np.ndarray,
+    angle_deg: float,
+    offsets: np.ndarray,
+    center: Tuple[float, float],
+    diag: float,
+) -> np.ndarray:
+    if not len(edges) or not len(offsets):
+        return np.empty((0, 2, 2))
+
+    angle_rad = math.radians(float(angle_deg))
+    dx, dy = math.cos(angle_rad), math.sin(angle_rad)
+    nx, ny = -dy, dx
+    cx, cy = float(center[0]), float(center[1])
+
+    # Tarama uzayına döndür
+    px = edges[..., 0] - cx
+    py = edges[..., 1] - cy
+    u = px * dx + py * dy
+    v = px * nx + py * ny
+
+    u0, u1 = u[:, 0], u[:, 1]
+    v0, v1 = v[:, 0], v[:, 1]
+    keep = v0 != v1
+    u0, u1, v0, v1 = u0[keep], u1[keep], v0[keep], v1[keep]
+    vmin = np.minimum(v0, v1)
+    vmax = np.maximum(v0, v1)
+
+    # Eşit aralıklı olmayan ofsetlere de izin ver: her kenarın kestiği çizgi aralığı
+    offsets = np.asarray(offsets, dtype=float)
+    k_lo = np.searchsorted(offsets, vmin, side="left")
+    k_hi = np.searchsorted(offsets, vmax, side="left")
+    counts = k_hi - k_lo
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty((0, 2, 2))
+
+    edge_idx = np.repeat(np.arange(len(counts)), counts)
+    first = np.repeat(np.cumsum(counts) - counts, counts)
+    k = np.repeat(k_lo, counts) + (np.arange(total) - first)
+
+    vk = offsets[k]
+    e0u, e1u, e0v, e1v = u0[edge_idx], u1[edge_idx], v0[edge_idx], v1[edge_idx]
+    uk = e0u + (vk - e0v) * (e1u - e0u) / (e1v - e0v)
+
+    order = np.lexsort((uk, k))
+    k = k[order].reshape(-1, 2)
+    uk = uk[order].reshape(-1, 2)
+
+    ua = np.clip(uk[:, 0], -diag, diag)
+    ub = np.clip(uk[:, 1], -diag, diag)
+    ok = ub - ua > 1e-9
+    ua, ub, vk = ua[ok], ub[ok], offsets[k[ok, 0]]
+
+    bx = cx + nx * vk
+    by = cy + ny * vk
+    spans = np.empty((len(vk), 2, 2))
+    spans[:, 0, 0] = bx + dx * ua
+    spans[:, 0, 1] = by + dy * ua
+    spans[:, 1, 0] = bx + dx * ub
+    spans[:, 1, 1] = by + dy * ub
+    return spans
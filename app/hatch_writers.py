@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from typing import BinaryIO, List, Optional
+
+import numpy as np
+import shapely
+
+
+# ------------------------------------------------
+#  ÇIKTI YAZICILARI
+# ------------------------------------------------
+# Kontur halkaları ve tarama parçaları tek seferde metne dökülür; nokta başına
+# fitz.Point / shape.draw_line çağrısı yapılmaz.
+
+HATCH_WIDTH = 0.7
+
+# Akışlı yazıcılar taramayı bu kadar parçalık bloklar halinde yazar (bellek sınırlı)
+STREAM_CHUNK = 4096
+
+
+def polygon_rings(geom) -> List[np.ndarray]:
+    """Polygon / MultiPolygon'un tüm halkaları (dış + iç) kapalı (n, 2) dizileri olarak."""
+    if geom is None or geom.is_empty:
+        return []
+    polys = shapely.get_parts(geom)
+    rings = shapely.get_rings(polys[shapely.get_type_id(polys) == 3])
+    return [shapely.get_coordinates(r) for r in rings]
+
+
+def _ring_points(ring: np.ndarray, page_height: Optional[float] = None) -> np.ndarray:
+    # 2 basamağa yuvarlanmış halka noktaları (page_height verilirse y çevrilir);
+    # yuvarlama sonrası üst üste düşen ardışık noktalar atılır
+    y = ring[:, 1] if page_height is None else page_height - ring[:, 1]
+    pts = np.round(np.column_stack([ring[:, 0], y]), 2)
+    return pts[np.r_[True, np.any(pts[1:] != pts[:-1], axis=1)]]
+
+
+def _span_rows(spans: np.ndarray, page_height: Optional[float] = None) -> np.ndarray:
+    # (s, 2, 2) → (s, 4) x0 y0 x1 y1 satırları
+    flat = np.asarray(spans, dtype=float).reshape(-1, 4).copy()
+    if page_height is not None:
+        flat[:, 1] = page_height - flat[:, 1]
+        flat[:, 3] = page_height - flat[:, 3]
+    return flat
+
+
+def _fmt_pairs(pts: np.ndarray, op: str) -> str:
+    # (n, 2) noktaları "x y op" satırlarına çevirir (tek bir % biçimlendirmesiyle)
+    if not len(pts):
+        return ""
+    return (f"%.2f %.2f {op}\n" * len(pts)) % tuple(pts.ravel().tolist())
+
+
+def pdf_content_stream(
+    rings: List[np.ndarray],
+    spans: np.ndarray,
+    page_height: float,
+    outline_width: float,
+    hatch_width: float = HATCH_WIDTH,
+) -> bytes:
+    """Konturu halka başına tek polyline, taramayı tek bir m/l yolu olarak yazar.
+
+    Girdi koordinatları PyMuPDF gibi sol-üst orijinlidir; PDF için y çevrilir.
+    """
+    out = ["q\n0 0 0 RG\n0 J\n0 j\n"]
+
+    if rings:
+        out.append(f"{outline_width:g} w\n")
+        for ring in rings:
+            if len(ring) < 2:
+                continue
+            pts = _ring_points(ring, page_height)
+            out.append(_fmt_pairs(pts[:1], "m"))
+            out.append(_fmt_pairs(pts[1:], "l"))
+            out.append("h\n")
+        out.append("S\n")
+
+    spans = np.asarray(spans, dtype=float).reshape(-1, 2, 2)
+    if len(spans):
+        out.append(f"{hatch_width:g} w\n")
+        flat = _span_rows(spans, page_height)
+        out.append(("%.2f %.2f m %.2f %.2f l\n" * len(flat)) % tuple(flat.ravel().tolist()))
+        out.append("S\n")
+
+    out.append("Q\n")
+    return "".join(out).encode("ascii")
+
+
+def write_svg(
+    out: BinaryIO,
+    rings: List[np.ndarray],
+    spans: np.ndarray,
+    width: float,
+    height: float,
+    outline_width: float,
+    hatch_width: float = HATCH_WIDTH,
+) -> None:
+    """Konturu tek <path>, taramayı STREAM_CHUNK'lık <path> blokları olarak `out`'a akıtır.
+
+    SVG de sol-üst orijinli olduğundan y çevrilmez; birim pt (viewBox = sayfa).
+    """
+    out.write((
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.2f}pt" height="{height:.2f}pt" '
+        f'viewBox="0 0 {width:.2f} {height:.2f}">\n'
+        '<g fill="none" stroke="#000" stroke-linecap="butt" stroke-linejoin="miter">\n'
+    ).encode("ascii"))
+
+    ring_pts = [_ring_points(r) for r in rings if len(r) >= 2]
+    if ring_pts:
+        out.write(f'<path stroke-width="{outline_width:g}" d="'.encode("ascii"))
+        for pts in ring_pts:
+            d = "M%.2f %.2f" % tuple(pts[0]) + ("L%.2f %.2f" * (len(pts) - 1)) % tuple(pts[1:].ravel().tolist()) + "Z"
+            out.write(d.encode("ascii"))
+        out.write(b'"/>\n')
+
+    flat = _span_rows(spans)
+    for i in range(0, len(flat), STREAM_CHUNK):
+        block = flat[i:i + STREAM_CHUNK]
+        d = ("M%.2f %.2fL%.2f %.2f" * len(block)) % tuple(block.ravel().tolist())
+        out.write(f'<path stroke-width="{hatch_width:g}" d="{d}"/>\n'.encode("ascii"))
+
+    out.write(b"</g>\n</svg>\n")
+
+
+def write_dxf(
+    out: BinaryIO,
+    rings: List[np.ndarray],
+    spans: np.ndarray,
+    page_height: float,
+    scale: float = 1.0,
+) -> None:
+    """R12 (AC1009) ASCII DXF: halkalar KONTUR katmanında kapalı POLYLINE, tarama TARAMA
+    katmanında LINE. DXF y-yukarı olduğundan y çevrilir; `scale` pt → çizim birimi
+    (ör. 25.4 / 72 ile mm).
+    """
+    out.write(b"0\nSECTION\n2\nHEADER\n9\n$ACADVER\n1\nAC1009\n0\nENDSEC\n0\nSECTION\n2\nENTITIES\n")
+
+    for ring in rings:
+        if len(ring) < 2:
+            continue
+        pts = _ring_points(ring, page_height) * scale
+        if len(pts) > 2 and np.array_equal(pts[0], pts[-1]):
+            pts = pts[:-1]  # kapalı bayrağı (70=1) son kenarı zaten çizer
+        out.write(b"0\nPOLYLINE\n8\nKONTUR\n66\n1\n70\n1\n10\n0.0\n20\n0.0\n30\n0.0\n")
+        out.write((("0\nVERTEX\n8\nKONTUR\n10\n%.3f\n20\n%.3f\n30\n0.0\n" * len(pts)) % tuple(pts.ravel().tolist())).encode("ascii"))
+        out.write(b"0\nSEQEND\n8\nKONTUR\n")
+
+    flat = _span_rows(spans, page_height) * scale
+    for i in range(0, len(flat), STREAM_CHUNK):
+        block = flat[i:i + STREAM_CHUNK]
+        text = ("0\nLINE\n8\nTARAMA\n10\n%.3f\n20\n%.3f\n30\n0.0\n11\n%.3f\n21\n%.3f\n31\n0.0\n" * len(block)) % tuple(block.ravel().tolist())
+        out.write(text.encode("ascii"))
+
+    out.write(b"0\nENDSEC\n0\nEOF\n")
@@ -1,24 +1,857 @@
 from __future__ import annotations
 
+import io
 import os
 import math
+import queue
+import struct
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Union, Optional
+from typing import Any, Callable, Union, Optional, List, Tuple, Sequence, BinaryIO, Dict, Iterator
 
+import numpy as np
 import fitz  # PyMuPDF
-from shapely.geometry import LineString, box, Polygon
+import shapely
+from shapely.geometry import box
 from shapely.ops import unary_union, polygonize
 
+from bezier import flatten_cubics, flatten_cubics_adaptive
+from disk_cache import CACHE_ROOT, DiskLRUCache, sha256_bytes, sha256_file
+from hatch_scanline import edge_line_ranges, hatch_spans, hatch_spans_tiled, ring_edges, scan_offsets, spans_from_edges
+from hatch_writers import pdf_content_stream, polygon_rings, write_dxf, write_svg
+
+
+# Dosya yolu ya da bellekteki PDF içeriği
+PdfSource = Union[str, Path, bytes, bytearray, memoryview]
+
+# Geometri önbelleği: çıkarım mantığı değişirse sürümü artır (eski kayıtlar kullanılmaz)
+GEOMETRY_CACHE_VERSION = 4
+GEOMETRY_CACHE_MAX_BYTES = int(os.environ.get("GEOMETRY_CACHE_MAX_MB", "256")) * 1024 * 1024
+OUTPUT_CACHE_VERSION = 1
+OUTPUT_CACHE_MAX_BYTES = int(os.environ.get("OUTPUT_CACHE_MAX_MB", "512")) * 1024 * 1024
+
+# Aynı geometri + taramadan üretilebilen çıktı biçimleri
+OUTPUT_FORMATS = ("pdf", "svg", "dxf")
+
+# İlerleme bildirilirken tarama bu kadar çizgilik parçalar halinde kesilir
+HATCH_CHUNK_LINES = 256
+
 
 def bezier_points(p0, p1, p2, p3, n: int = 20):
-    pts = []
-    for i in range(n + 1):
-        t = i / n
-        mt = 1 - t
-        x = (mt**3) * p0.x + 3 * (mt**2) * t * p1.x + 3 * mt * (t**2) * p2.x + (t**3) * p3.x
-        y = (mt**3) * p0.y + 3 * (mt**2) * t * p1.y + 3 * mt * (t**2) * p2.y + (t**3) * p3.y
-        pts.append((x, y))
-    return pts
+    ctrl = np.array([[(p0.x, p0.y), (p1.x, p1.y), (p2.x, p2.y), (p3.x, p3.y)]], dtype=float)
+    return [tuple(pt) for pt in flatten_cubics(ctrl, n=n)[0].tolist()]
+
+
+def collect_segments(bicak_izleri, offset) -> Tuple[np.ndarray, np.ndarray]:
+    """Seçili yolların "l" ve "c" öğelerini (k, 2, 2) ve (m, 4, 2) dizilerine toplar."""
+    lines, cubics = [], []
+    for p in bicak_izleri:
+        for item in p["items"]:
+            if item[0] == "l":
+                lines.append([(v[0], v[1]) for v in item[1:3]])
+            elif item[0] == "c":
+                cubics.append([(v[0], v[1]) for v in item[1:5]])
+    off = np.array([offset.x, offset.y], dtype=float)
+    lines = np.array(lines, dtype=float).reshape(-1, 2, 2) - off
+    cubics = np.array(cubics, dtype=float).reshape(-1, 4, 2) - off
+    return lines, cubics
+
+
+def flatten_segments(
+    lines: np.ndarray,
+    cubics: np.ndarray,
+    bezier_adim: int = 20,
+    bezier_tolerans: Optional[float] = None,
+) -> np.ndarray:
+    # Düz çizgiler + açılmış eğriler tek bir (s, 2, 2) iki noktalı parça dizisine
+    parts = [lines]
+    if len(cubics):
+        if bezier_tolerans is None:
+            polylines = [flatten_cubics(cubics, n=int(bezier_adim))]
+        else:
+            polylines = [pts[None] for pts in flatten_cubics_adaptive(cubics, bezier_tolerans)]
+        for pts in polylines:
+            parts.append(np.stack([pts[:, :-1], pts[:, 1:]], axis=2).reshape(-1, 2, 2))
+    return np.concatenate(parts) if len(parts) > 1 else lines
+
+
+def _merge_collinear(segs: np.ndarray, grid: float) -> np.ndarray:
+    # Aynı doğru üzerindeki (yön + normal ofseti eşit) üst üste binen / uç uca
+    # eklenen parçaları tek parçada birleştirir
+    d = segs[:, 1] - segs[:, 0]
+    theta = np.mod(np.arctan2(d[:, 1], d[:, 0]), np.pi)
+    ux, uy = np.cos(theta), np.sin(theta)
+    offset = segs[:, 0, 0] * -uy + segs[:, 0, 1] * ux
+    key_t = np.round(theta / 1e-9).astype(np.int64)
+    key_o = np.round(offset / grid).astype(np.int64)
+    order = np.lexsort((key_o, key_t))
+    kt, ko = key_t[order], key_o[order]
+    starts = np.flatnonzero(np.r_[True, (kt[1:] != kt[:-1]) | (ko[1:] != ko[:-1])])
+    sizes = np.diff(np.r_[starts, len(order)])
+
+    keep = np.ones(len(segs), dtype=bool)
+    out = []
+    for st, size in zip(starts[sizes > 1], sizes[sizes > 1]):
+        idx = order[st:st + size]
+        g = segs[idx]
+        t = g[..., 0] * ux[idx, None] + g[..., 1] * uy[idx, None]
+        lo_end = np.argmin(t, axis=1)
+        t0 = t[np.arange(size), lo_end]
+        t1 = t[np.arange(size), 1 - lo_end]
+        srt = np.argsort(t0, kind="stable")
+        run_start = srt[0]
+        run_end, run_t1 = srt[0], t1[srt[0]]
+        for j in srt[1:]:
+            if t0[j] <= run_t1 + grid:
+                if t1[j] > run_t1:
+                    run_end, run_t1 = j, t1[j]
+                continue
+            out.append((g[run_start, lo_end[run_start]], g[run_end, 1 - lo_end[run_end]]))
+            run_start, run_end, run_t1 = j, j, t1[j]
+        out.append((g[run_start, lo_end[run_start]], g[run_end, 1 - lo_end[run_end]]))
+        keep[idx] = False
+
+    if not out:
+        return segs
+    return np.concatenate([segs[keep], np.array(out, dtype=float).reshape(-1, 2, 2)])
+
+
+def prenode_segments(segs: np.ndarray, snap_grid: Optional[float] = 0.001) -> Tuple[np.ndarray, dict]:
+    """unary_union öncesi parçaları sadeleştirir; kaldırılan parça sayılarını da döner.
+
+    Koordinatlar `snap_grid` (pt) ızgarasına yuvarlanır, sıfır uzunluklular atılır,
+    yönden bağımsız birebir aynı parçalar tekilleştirilir ve doğrudaş parçalar birleştirilir.
+    """
+    segs = np.asarray(segs, dtype=float).reshape(-1, 2, 2)
+    report = {"girdi": len(segs), "dejenere": 0, "tekrar": 0, "dogrudas": 0}
+    if not len(segs):
+        report["cikti"] = 0
+        return segs, report
+
+    grid = float(snap_grid) if snap_grid else 0.0
+    if grid > 0:
+        segs = np.round(segs / grid) * grid
+
+    nonzero = np.any(segs[:, 0] != segs[:, 1], axis=1)
+    report["dejenere"] = int((~nonzero).sum())
+    segs = segs[nonzero]
+
+    # Yön bağımsız karşılaştırma için uçları sırala (küçük uç önce)
+    flip = (segs[:, 0, 0] > segs[:, 1, 0]) | ((segs[:, 0, 0] == segs[:, 1, 0]) & (segs[:, 0, 1] > segs[:, 1, 1]))
+    segs[flip] = segs[flip][:, ::-1]
+    _, first = np.unique(segs.reshape(-1, 4), axis=0, return_index=True)
+    report["tekrar"] = len(segs) - len(first)
+    segs = segs[np.sort(first)]
+
+    before = len(segs)
+    segs = _merge_collinear(segs, grid if grid > 0 else 1e-9)
+    report["dogrudas"] = before - len(segs)
+    report["cikti"] = len(segs)
+    return segs, report
+
+
+# İstatistiklerde aşamaların gösterim sırası
+STAGES = (
+    "open", "get_drawings", "knife_filter", "flatten", "prenode", "union",
+    "polygonize", "hole_detection", "hatch", "outline_draw", "save",
+)
+
+
+class ProcessCancelled(Exception):
+    """İşlem `cancel` olayı ile durduruldu; yarım çıktı bırakılmaz."""
+
+
+class KnifeTraceNotFound(ValueError):
+    """Sayfada hedef kalınlıkta bıçak izi yok (kapak, açıklama sayfası vb.)."""
+
+
+@dataclass
+class ProgressEvent:
+    # kind: "start" / "end" (aşama), "chunk" (tarama parçası), "done" (sonuç `result` içinde)
+    # done/total olayı gönderen açının parçalarıdır; oran verilirse aşamanın (tüm açıların) ilerlemesidir
+    stage: str
+    kind: str
+    done: int = 0
+    total: int = 0
+    sure: float = 0.0
+    aci: Optional[float] = None
+    result: Any = None
+    oran: Optional[float] = None
+
+    @property
+    def fraction(self) -> float:
+        # Aşama sırasına göre kaba ilerleme oranı (0..1); tarama parçaları arayı doldurur
+        if self.kind == "done":
+            return 1.0
+        if self.stage not in STAGES:
+            return 0.0
+        i = STAGES.index(self.stage)
+        if self.kind == "end":
+            i += 1
+        elif self.kind == "chunk" and self.oran is not None:
+            i += self.oran
+        elif self.kind == "chunk" and self.total:
+            i += self.done / self.total
+        return min(1.0, i / len(STAGES))
+
+
+@dataclass
+class ProcessStats:
+    # Aşama başına duvar süresi (sn) + geometri sayıları; yavaş girdileri bulmak için
+    sure: Dict[str, float] = field(default_factory=dict)
+    drawings: int = 0
+    selected_paths: int = 0
+    segments: int = 0
+    faces: int = 0
+    hatch_lines: int = 0
+    fallback_tier: int = 0
+    cache_hit: bool = False
+    output_cache_hits: int = 0
+    prenode: Optional[dict] = None
+    progress: Optional[Callable[[ProgressEvent], None]] = field(default=None, repr=False, compare=False)
+    cancel: Optional[threading.Event] = field(default=None, repr=False, compare=False)
+
+    @contextmanager
+    def stage(self, name: str):
+        self.check()
+        self.emit(ProgressEvent(name, "start"))
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t0
+            self.sure[name] = self.sure.get(name, 0.0) + dt
+        self.emit(ProgressEvent(name, "end", sure=dt))
+
+    def check(self) -> None:
+        if self.cancel is not None and self.cancel.is_set():
+            raise ProcessCancelled()
+
+    def emit(self, event: ProgressEvent) -> None:
+        if self.progress is not None:
+            self.progress(event)
+
+    @property
+    def watched(self) -> bool:
+        return self.progress is not None or self.cancel is not None
+
+    @property
+    def toplam(self) -> float:
+        return sum(self.sure.values())
+
+    def as_row(self) -> dict:
+        row = {"toplam_s": round(self.toplam, 4)}
+        for name in STAGES:
+            if name in self.sure:
+                row[f"{name}_s"] = round(self.sure[name], 4)
+        row.update(
+            drawings=self.drawings,
+            selected_paths=self.selected_paths,
+            segments=self.segments,
+            faces=self.faces,
+            hatch_lines=self.hatch_lines,
+            fallback_tier=self.fallback_tier,
+            cache_hit=self.cache_hit,
+            output_cache_hits=self.output_cache_hits,
+        )
+        return row
+
+
+class _AngleProgress:
+    # compute_hatch'e verilen açı başına görünüm: iptal ve izleme ProcessStats'tan gelir,
+    # parça olaylarına aynı anda taranan tüm açıların ortalama ilerlemesi (oran) eklenir
+    def __init__(self, stats: ProcessStats, index: int, oranlar: List[float], lock: threading.Lock):
+        self.stats = stats
+        self.index = index
+        self.oranlar = oranlar
+        self.lock = lock
+
+    @property
+    def watched(self) -> bool:
+        return self.stats.watched
+
+    def check(self) -> None:
+        self.stats.check()
+
+    def emit(self, event: ProgressEvent) -> None:
+        if event.kind == "chunk" and event.total:
+            with self.lock:
+                self.oranlar[self.index] = event.done / event.total
+                event.oran = sum(self.oranlar) / len(self.oranlar)
+                self.stats.emit(event)
+            return
+        self.stats.emit(event)
+
+
+def _stage(stats: Optional[ProcessStats], name: str):
+    return stats.stage(name) if stats is not None else nullcontext()
+
+
+def _new_stats(return_stats: bool, progress=None, cancel=None) -> Optional[ProcessStats]:
+    if return_stats or progress is not None or cancel is not None:
+        return ProcessStats(progress=progress, cancel=cancel)
+    return None
+
+
+@dataclass
+class DieLineGeometry:
+    # Açıdan bağımsız ortak sonuç: taranacak poligon + bıçak izlerinin kapsadığı alan
+    poly_to_hatch: object
+    final_rect: Tuple[float, float, float, float]
+    # prenode_segments raporu (önbellekten gelen geometride yoktur)
+    prenode: Optional[dict] = None
+
+    @property
+    def page_size(self) -> Tuple[float, float]:
+        x0, y0, x1, y1 = self.final_rect
+        return x1 - x0 + 2, y1 - y0 + 2
+
+    @property
+    def offset(self) -> Tuple[float, float]:
+        return self.final_rect[0] - 1, self.final_rect[1] - 1
+
+
+class KnifeTraceIndex:
+    # Sayfa çizimlerini tek geçişte çizgi kalınlığı ve bbox dizilerine çevirir;
+    # bıçak izi arama kademelerinin hepsi bu dizilerden cevaplanır.
+
+    def __init__(self, paths: list, skip_fill: bool = False):
+        if skip_fill:
+            # Sadece dolgulu (konturu olmayan) baskı grafikleri bıçak izi olamaz
+            paths = [p for p in paths if p.get("type") != "f"]
+        self.paths = paths
+        n = len(paths)
+        self.width = np.full(n, np.nan)
+        self.bbox = np.zeros((n, 4))
+        for i, p in enumerate(paths):
+            w = p.get("width")
+            if w is not None:
+                self.width[i] = w
+            self.bbox[i] = tuple(p["rect"])
+
+        # Kalınlık aralığı sorguları için sıralı indeks (NaN'lar sona düşer)
+        self._w_order = np.argsort(self.width, kind="stable")
+        self._w_sorted = self.width[self._w_order]
+
+    def _width_mask(self, lo: float, hi: float) -> np.ndarray:
+        a = np.searchsorted(self._w_sorted, lo, side="left")
+        b = np.searchsorted(self._w_sorted, hi, side="right")
+        mask = np.zeros(len(self.paths), dtype=bool)
+        mask[self._w_order[a:b]] = True
+        return mask
+
+    def _take(self, mask: np.ndarray) -> list:
+        return [self.paths[i] for i in np.nonzero(mask)[0]]
+
+    def select(self, hedef_kalinlik: float, page_height: float) -> Tuple[list, int]:
+        # --- BIÇAK İZİ ARAMA STRATEJİSİ (Aynen Korundu) ---
+        # 1) hedef kalınlık ±0.1 ve sayfanın üst yarısı, 2) hedef kalınlık ±0.1,
+        # 3) kalınlık 1–5, 4) 50 pt'den büyük her yol. Dönen ikinci değer kademe (0 = yok).
+        # Not: ±0.1 sınırı float hatası için küçük bir payla genişletilip tam koşulla süzülür
+        near = self._width_mask(hedef_kalinlik - 0.1 - 1e-9, hedef_kalinlik + 0.1 + 1e-9)
+        near &= np.abs(self.width - hedef_kalinlik) <= 0.1
+        tiers = [
+            near & (self.bbox[:, 3] < (page_height / 2)),
+            near,
+            self._width_mask(1, 5),
+            ((self.bbox[:, 2] - self.bbox[:, 0]) > 50) | ((self.bbox[:, 3] - self.bbox[:, 1]) > 50),
+        ]
+        for tier, mask in enumerate(tiers, start=1):
+            if mask.any():
+                return self._take(mask), tier
+        return [], 0
+
+
+def classify_faces(polys: list):
+    # --- KRİTİK DÜZELTME: İÇ ÜÇGENLERİ DELİK OLARAK TANIMLA ---
+    # 1. Kabuğu en büyük yüz dış çerçeve; sadece onun kabuğu içindeki yüzler dikkate alınır
+    #    (yüz alanına bakılmaz: iç içe halkalarda içteki yüz dış banttan büyük olabilir)
+    # 2. Her yüzün kaç kabuğun içinde kaldığı STRtree ile bulunur (iç içe derinlik)
+    # 3. Tek derinlik = delik (taranmaz), çift derinlik = delik içindeki ada (taranır)
+    faces = np.asarray(polys, dtype=object)
+    if len(faces) == 1:
+        return faces[0]
+
+    shells = shapely.polygons(shapely.get_exterior_ring(faces))
+    outer = int(np.argmax(shapely.area(shells)))
+    tree = shapely.STRtree(shells)
+    # Yüzün iç noktası başka bir kabuğun içindeyse o yüz o kabuğa gömülüdür
+    face_idx, shell_idx = tree.query(shapely.point_on_surface(faces), predicate="within")
+    nested = face_idx != shell_idx
+    face_idx, shell_idx = face_idx[nested], shell_idx[nested]
+    depth = np.bincount(face_idx, minlength=len(faces))
+
+    inside = np.unique(face_idx[shell_idx == outer])
+    if not len(inside):
+        return faces[outer]
+
+    rel_depth = depth[inside] - depth[outer]
+    poly_to_hatch = shells[outer]
+    for d in range(1, int(rel_depth.max()) + 1):
+        level = shells[inside[rel_depth == d]]
+        if not len(level):
+            continue
+        if d % 2:
+            poly_to_hatch = poly_to_hatch.difference(shapely.coverage_union_all(level))
+        else:
+            poly_to_hatch = poly_to_hatch.union(shapely.coverage_union_all(level))
+    return poly_to_hatch
+
+
+def classify_shapes(polys: list):
+    # Birbirinden ayrık her bıçak şekli (değen ya da iç içe yüz kümesi) için
+    # classify_faces ayrı uygulanır; tek şekilde classify_faces ile aynı sonuç
+    faces = np.asarray(polys, dtype=object)
+    shells = shapely.polygons(shapely.get_exterior_ring(faces))
+    regions = shapely.get_parts(shapely.union_all(shells))
+    if len(regions) <= 1:
+        return classify_faces(polys)
+    face_idx, region_idx = shapely.STRtree(regions).query(shapely.point_on_surface(faces), predicate="within")
+    owner = np.full(len(faces), -1)
+    owner[face_idx] = region_idx
+    shapes = [classify_faces(list(faces[owner == r])) for r in range(len(regions)) if np.any(owner == r)]
+    return shapely.union_all(shapes)
+
+
+def build_hatch_polygon(
+    all_lines,
+    buffer_eps: float = 0.01,
+    stats: Optional[ProcessStats] = None,
+    tum_sekiller: bool = False,
+):
+    with _stage(stats, "union"):
+        merged = unary_union(all_lines)
+    with _stage(stats, "polygonize"):
+        polys = list(polygonize(merged))
+
+        if not polys:
+            refined = merged.buffer(1.2).buffer(-1.1)
+            if refined.geom_type == 'Polygon':
+                polys = [refined]
+            elif hasattr(refined, 'geoms'):
+                polys = [g for g in refined.geoms if g.geom_type == 'Polygon']
+
+    if stats is not None:
+        stats.faces = len(polys)
+
+    with _stage(stats, "hole_detection"):
+        if not polys:
+            poly_to_hatch = box(*merged.bounds)
+        else:
+            poly_to_hatch = classify_shapes(polys) if tum_sekiller else classify_faces(polys)
+
+        return poly_to_hatch.buffer(float(buffer_eps))
+
+
+def extract_geometry(
+    doc: fitz.Document,
+    *,
+    hedef_kalinlik: float = 2.83,
+    bezier_adim: int = 20,
+    buffer_eps: float = 0.01,
+    bezier_tolerans: Optional[float] = None,
+    hafif_cikarim: bool = False,
+    snap_grid: Optional[float] = 0.001,
+    stats: Optional[ProcessStats] = None,
+    page_index: int = 0,
+    tum_sekiller: bool = False,
+) -> DieLineGeometry:
+    # tum_sekiller=True: sayfadaki tüm ayrık bıçak şekilleri korunur (yalnızca en büyüğü değil)
+    src_page = doc[page_index]
+    page_height = src_page.rect.height
+    with _stage(stats, "get_drawings"):
+        # Hafif çıkarım: get_cdrawings (Point/Rect nesnesi üretmez) + dolgulu yollar atlanır
+        paths = src_page.get_cdrawings() if hafif_cikarim else src_page.get_drawings()
+
+    with _stage(stats, "knife_filter"):
+        index = KnifeTraceIndex(paths, skip_fill=hafif_cikarim)
+        bicak_izleri, tier = index.select(hedef_kalinlik, page_height)
+    if stats is not None:
+        stats.drawings = len(paths)
+        stats.selected_paths = len(bicak_izleri)
+        stats.fallback_tier = tier
+    if not bicak_izleri:
+        raise KnifeTraceNotFound("Bıçak izi bulunamadı.")
+
+    try:
+        union_rect = fitz.Rect(bicak_izleri[0]["rect"])
+        for p in bicak_izleri[1:]: union_rect |= p["rect"]
+        final_rect = union_rect
+    except:
+        final_rect = src_page.rect
+
+    offset = final_rect.tl - fitz.Point(1, 1)
+
+    with _stage(stats, "flatten"):
+        # bezier_tolerans verilirse eğriler sabit bezier_adim yerine adaptif bölünür
+        lines, cubics = collect_segments(bicak_izleri, offset)
+        segs = flatten_segments(lines, cubics, bezier_adim, bezier_tolerans)
+
+    with _stage(stats, "prenode"):
+        # Tekrarlı konturlar ve neredeyse değen uçlar düğümlemeden önce temizlenir
+        segs, prenode = prenode_segments(segs, snap_grid)
+        all_lines = shapely.multilinestrings(segs) if len(segs) else shapely.MultiLineString()
+    if stats is not None:
+        stats.segments = len(segs)
+        stats.prenode = prenode
+
+    poly_to_hatch = build_hatch_polygon(all_lines, buffer_eps, stats, tum_sekiller)
+    return DieLineGeometry(poly_to_hatch, tuple(final_rect), prenode)
+
+
+def split_shapes(geometry: DieLineGeometry) -> List[DieLineGeometry]:
+    """Birbirine değmeyen bıçak şekillerini ayrı geometrilere böler (sol-üstten sıralı).
+
+    Bir parça, dış halkası onu içeren en dıştaki parçanın şekline aittir (deliklerin
+    içindeki adacıklar aynı şekilde kalır). Her şekil kendi sınırlarına taşınır.
+    """
+    geom = geometry.poly_to_hatch
+    if geom is None or geom.is_empty:
+        return []
+    parts = shapely.get_parts(geom)
+    parts = parts[shapely.get_type_id(parts) == 3]
+    if len(parts) <= 1:
+        groups = [parts]
+    else:
+        shells = shapely.polygons(shapely.get_exterior_ring(parts))
+        areas = shapely.area(shells)
+        owner = np.arange(len(parts))
+        # (i, j) çiftleri: i'nin kabuğu j'nin kabuğunun içinde
+        inner, outer = shapely.STRtree(shells).query(shells, predicate="within")
+        mask = inner != outer
+        for i, j in zip(inner[mask], outer[mask]):
+            if areas[j] > areas[owner[i]]:
+                owner[i] = j
+        groups = [parts[owner == root] for root in np.unique(owner)]
+
+    ox, oy = geometry.offset
+    shapes = []
+    for group in groups:
+        poly = shapely.union_all(group) if len(group) > 1 else group[0]
+        bx0, by0, bx1, by1 = poly.bounds
+        # Şekil kendi sayfasında yine (1, 1) köşesinden başlar
+        moved = shapely.transform(poly, lambda c: c + np.array([1 - bx0, 1 - by0]))
+        shapes.append(DieLineGeometry(moved, (bx0 + ox, by0 + oy, bx1 + ox, by1 + oy)))
+    shapes.sort(key=lambda g: (round(g.final_rect[1], 1), g.final_rect[0]))
+    return shapes
+
+
+def geometry_cache_key(
+    pdf_hash: str,
+    *,
+    hedef_kalinlik: float,
+    bezier_adim: int,
+    buffer_eps: float,
+    bezier_tolerans: Optional[float] = None,
+    hafif_cikarim: bool = False,
+    snap_grid: Optional[float] = 0.001,
+    page_index: int = 0,
+    tum_sekiller: bool = False,
+) -> str:
+    # İlk sayfa / tek şekil anahtarı eski biçimde kalır (mevcut kayıtlar geçerli)
+    extra = f"|p{int(page_index)}" if page_index else ""
+    if tum_sekiller:
+        extra += "|all"
+    return f"v{GEOMETRY_CACHE_VERSION}|{pdf_hash}|{float(hedef_kalinlik)!r}|{int(bezier_adim)}|{float(buffer_eps)!r}|{bezier_tolerans!r}|{bool(hafif_cikarim)}|{snap_grid!r}{extra}"
+
+
+def geometry_to_bytes(geometry: DieLineGeometry) -> bytes:
+    return struct.pack("<4d", *geometry.final_rect) + shapely.to_wkb(geometry.poly_to_hatch)
+
+
+def geometry_from_bytes(data: bytes) -> DieLineGeometry:
+    final_rect = struct.unpack_from("<4d", data)
+    return DieLineGeometry(shapely.from_wkb(data[struct.calcsize("<4d"):]), tuple(final_rect))
+
+
+_default_geometry_cache: Optional[DiskLRUCache] = None
+
+
+def default_geometry_cache() -> DiskLRUCache:
+    global _default_geometry_cache
+    if _default_geometry_cache is None:
+        _default_geometry_cache = DiskLRUCache(CACHE_ROOT / "geometry", GEOMETRY_CACHE_MAX_BYTES, suffix=".wkb")
+    return _default_geometry_cache
+
+
+def output_cache_keys(
+    pdf_hash: str,
+    configs: Sequence[dict],
+    *,
+    hedef_kalinlik: float = 2.83,
+    tarama_araligi: int = 6,
+    bezier_adim: int = 20,
+    buffer_eps: float = 0.01,
+    bezier_tolerans: Optional[float] = None,
+    hafif_cikarim: bool = False,
+    snap_grid: Optional[float] = 0.001,
+) -> List[str]:
+    # Çıktı yalnızca geometri + aralık + açıya bağlıdır; "yon" sadece dosya adını belirler
+    base = geometry_cache_key(
+        pdf_hash, hedef_kalinlik=hedef_kalinlik, bezier_adim=bezier_adim, buffer_eps=buffer_eps, bezier_tolerans=bezier_tolerans,
+        hafif_cikarim=hafif_cikarim, snap_grid=snap_grid,
+    )
+    return [f"o{OUTPUT_CACHE_VERSION}|{base}|{int(tarama_araligi)}|{float(cfg['TARAMA_ACISI_DERECE'])!r}" for cfg in configs]
+
+
+_default_output_cache: Optional[DiskLRUCache] = None
+
+
+def default_output_cache() -> DiskLRUCache:
+    global _default_output_cache
+    if _default_output_cache is None:
+        # PDF/SVG/DXF aynı önbellekte: uzantı biçimden bağımsız
+        _default_output_cache = DiskLRUCache(CACHE_ROOT / "outputs", OUTPUT_CACHE_MAX_BYTES, suffix=".bin")
+    return _default_output_cache
+
+
+def _is_stream(source: PdfSource) -> bool:
+    return isinstance(source, (bytes, bytearray, memoryview))
+
+
+def open_pdf(source: PdfSource) -> fitz.Document:
+    if _is_stream(source):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(str(source))
+
+
+def load_geometry(
+    source: PdfSource,
+    *,
+    hedef_kalinlik: float = 2.83,
+    bezier_adim: int = 20,
+    buffer_eps: float = 0.01,
+    bezier_tolerans: Optional[float] = None,
+    geometry_cache: Optional[DiskLRUCache] = None,
+    hafif_cikarim: bool = False,
+    snap_grid: Optional[float] = 0.001,
+    stats: Optional[ProcessStats] = None,
+    pdf_hash: Optional[str] = None,
+    page_index: int = 0,
+    tum_sekiller: bool = False,
+) -> DieLineGeometry:
+    # Önbellekte varsa çıkarım → union → polygonize tamamen atlanır
+    key = None
+    if geometry_cache is not None:
+        with _stage(stats, "open"):
+            if pdf_hash is None:
+                pdf_hash = sha256_bytes(source) if _is_stream(source) else sha256_file(source)
+            key = geometry_cache_key(
+                pdf_hash, hedef_kalinlik=hedef_kalinlik, bezier_adim=bezier_adim, buffer_eps=buffer_eps, bezier_tolerans=bezier_tolerans,
+                hafif_cikarim=hafif_cikarim, snap_grid=snap_grid, page_index=page_index, tum_sekiller=tum_sekiller,
+            )
+            data = geometry_cache.get(key)
+        if data is not None:
+            if stats is not None:
+                stats.cache_hit = True
+            return geometry_from_bytes(data)
+
+    with _stage(stats, "open"):
+        doc = open_pdf(source)
+    try:
+        geometry = extract_geometry(
+            doc, hedef_kalinlik=hedef_kalinlik, bezier_adim=bezier_adim, buffer_eps=buffer_eps, bezier_tolerans=bezier_tolerans,
+            hafif_cikarim=hafif_cikarim, snap_grid=snap_grid, stats=stats, page_index=page_index, tum_sekiller=tum_sekiller,
+        )
+    finally:
+        doc.close()
+
+    if key is not None:
+        geometry_cache.set(key, geometry_to_bytes(geometry))
+    return geometry
+
+
+def compute_hatch(
+    geometry: DieLineGeometry,
+    tarama_araligi: int = 6,
+    tarama_acisi_derece: float = 45.0,
+    stats: Optional[ProcessStats] = None,
+    hatch_workers: Optional[int] = None,
+) -> np.ndarray:
+    # Difference ile oluşturduğumuz için iç boşluklarda açıklık oluşmaz;
+    # tüm çizgiler tek scanline geçişinde kesilir (bkz. hatch_scanline)
+    width, height = geometry.page_size
+    diag = math.sqrt(width**2 + height**2)
+    center = (width / 2, height / 2)
+    aci = float(tarama_acisi_derece)
+    workers = int(hatch_workers or 1)
+    if stats is None or not stats.watched:
+        if workers > 1:
+            # Çok büyük bıçaklar: normal boyunca şeritler paralel kesilir (sonuç aynı)
+            return hatch_spans_tiled(geometry.poly_to_hatch, aci, int(tarama_araligi), center, diag, workers)
+        return hatch_spans(geometry.poly_to_hatch, aci, int(tarama_araligi), center, diag)
+
+    # İlerleme/iptal istenirse çizgiler ardışık parçalarda kesilir (hatch_workers > 1 ise
+    # parçalar paralel); parçalar sırayla birleştiğinden sonuç tek geçişle aynıdır.
+    # İptal her parça arasında denetlenir
+    edges = ring_edges(geometry.poly_to_hatch)
+    offsets = scan_offsets(diag, int(tarama_araligi))
+    k_lo, k_hi = edge_line_ranges(edges, aci, offsets, center) if len(edges) else (None, None)
+    n = max(1, math.ceil(len(offsets) / HATCH_CHUNK_LINES))
+
+    def run(i):
+        lo, hi = i * HATCH_CHUNK_LINES, (i + 1) * HATCH_CHUNK_LINES
+        sel = edges if k_lo is None else edges[(k_hi > lo) & (k_lo < hi)]
+        return spans_from_edges(sel, aci, offsets[lo:hi], center, diag)
+
+    parts = []
+    ex = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        chunks = [ex.submit(run, i) for i in range(n)] if ex is not None else range(n)
+        for i, chunk in enumerate(chunks):
+            stats.check()
+            parts.append(chunk.result() if ex is not None else run(chunk))
+            stats.emit(ProgressEvent("hatch", "chunk", i + 1, n, aci=aci))
+    finally:
+        if ex is not None:
+            ex.shutdown(wait=True, cancel_futures=True)
+    return np.concatenate(parts) if parts else np.empty((0, 2, 2))
+
+
+def write_hatch_pdf(
+    geometry: DieLineGeometry,
+    spans: np.ndarray,
+    cikti: Union[str, Path, BinaryIO],
+    hedef_kalinlik: float = 2.83,
+    stats: Optional[ProcessStats] = None,
+) -> Union[Path, BinaryIO]:
+    # cikti bir yol ya da yazılabilir bir bayt tamponu (io.BytesIO vb.) olabilir
+    return write_hatch_pdf_pages([(geometry, spans)], cikti, hedef_kalinlik, stats)
+
+
+def write_hatch_pdf_pages(
+    pages: Sequence[Tuple[DieLineGeometry, np.ndarray]],
+    cikti: Union[str, Path, BinaryIO],
+    hedef_kalinlik: float = 2.83,
+    stats: Optional[ProcessStats] = None,
+) -> Union[Path, BinaryIO]:
+    # Her (geometri, tarama) çifti kendi boyutunda bir sayfa olur
+    new_doc = fitz.open()
+    try:
+        for geometry, spans in pages:
+            width, height = geometry.page_size
+            new_page = new_doc.new_page(width=width, height=height)
+
+            # Dış ve iç hatlar halka başına tek polyline, tarama tek bir yol olarak
+            # doğrudan içerik akışına yazılır (nokta başına draw_line çağrısı yok)
+            with _stage(stats, "outline_draw"):
+                content = pdf_content_stream(polygon_rings(geometry.poly_to_hatch), spans, height, hedef_kalinlik)
+
+            with _stage(stats, "save"):
+                xref = new_doc.get_new_xref()
+                new_doc.update_object(xref, "<<>>")
+                new_doc.update_stream(xref, content)
+                new_doc.xref_set_key(new_page.xref, "Contents", f"{xref} 0 R")
+
+        with _stage(stats, "save"):
+            if isinstance(cikti, (str, Path)):
+                new_doc.save(str(cikti), deflate=True, garbage=3)
+                cikti = Path(cikti)
+            else:
+                new_doc.save(cikti, deflate=True, garbage=3)
+    finally:
+        new_doc.close()
+    return cikti
+
+
+def write_hatch_output(
+    geometry: DieLineGeometry,
+    spans: np.ndarray,
+    fmt: str,
+    cikti: Union[str, Path, BinaryIO],
+    hedef_kalinlik: float = 2.83,
+    stats: Optional[ProcessStats] = None,
+) -> Union[Path, BinaryIO]:
+    # Aynı halkalar + tarama parçaları PDF / SVG / DXF olarak; SVG ve DXF doğrudan akıtılır
+    if fmt == "pdf":
+        return write_hatch_pdf(geometry, spans, cikti, hedef_kalinlik, stats)
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Bilinmeyen çıktı biçimi: {fmt}")
+    width, height = geometry.page_size
+    with _stage(stats, "save"):
+        rings = polygon_rings(geometry.poly_to_hatch)
+        fh = open(cikti, "wb") if isinstance(cikti, (str, Path)) else cikti
+        try:
+            if fmt == "svg":
+                write_svg(fh, rings, spans, width, height, hedef_kalinlik)
+            else:
+                write_dxf(fh, rings, spans, height)
+        finally:
+            if fh is not cikti:
+                fh.close()
+    return Path(cikti) if isinstance(cikti, (str, Path)) else cikti
+
+
+def output_name(dosya_adi: Union[str, Path], yon: int, uzanti: str = "pdf") -> str:
+    return f"{Path(dosya_adi).stem}-{yon}.{uzanti}"
+
+
+def _output_path(dosya_adi: Path, yon: int, output_dir: Optional[Union[str, Path]], uzanti: str = "pdf") -> Path:
+    out_dir = Path(output_dir) if output_dir else dosya_adi.parent
+    out_dir.mkdir(parents=True, exist_ok=True)
+    return out_dir / output_name(dosya_adi, yon, uzanti)
+
+
+def _hatch_configs(
+    geometry: DieLineGeometry,
+    configs: Sequence[dict],
+    tarama_araligi: int,
+    max_workers: Optional[int] = None,
+    stats: Optional[ProcessStats] = None,
+    hatch_workers: Optional[int] = None,
+) -> List[np.ndarray]:
+    angles = [float(cfg["TARAMA_ACISI_DERECE"]) for cfg in configs]
+    with _stage(stats, "hatch"):
+        # Açılar paralel taranınca parça olayları karışır; ilerleme açıların ortalaması olarak verilir
+        hatch_stats = [None] * len(angles)
+        if stats is not None:
+            oranlar, lock = [0.0] * len(angles), threading.Lock()
+            hatch_stats = [_AngleProgress(stats, k, oranlar, lock) for k in range(len(angles))]
+        if len(angles) > 1 and max_workers != 1:
+            with ThreadPoolExecutor(max_workers=max_workers or len(angles)) as ex:
+                all_spans = list(ex.map(lambda a, st: compute_hatch(geometry, tarama_araligi, a, stats=st, hatch_workers=hatch_workers), angles, hatch_stats))
+        else:
+            all_spans = [compute_hatch(geometry, tarama_araligi, a, stats=st, hatch_workers=hatch_workers) for a, st in zip(angles, hatch_stats)]
+    if stats is not None:
+        stats.hatch_lines += sum(len(sp) for sp in all_spans)
+    return all_spans
+
+
+def _save_outputs(
+    docs: Sequence[Sequence[Tuple[DieLineGeometry, np.ndarray]]],
+    paths: Sequence[Path],
+    hedef_kalinlik: float,
+    stats: Optional[ProcessStats] = None,
+    formats: Optional[Sequence[str]] = None,
+) -> List[Path]:
+    # docs[i] → paths[i] dosyasının sayfaları (formats[i] "pdf" değilse tek sayfa). Önce geçici
+    # adlara yazılır, hepsi bitince yerine taşınır: iptal ya da hata yarım/eksik çıktı bırakmaz
+    tmps = []
+    formats = formats or ["pdf"] * len(paths)
+    try:
+        for pages, path, fmt in zip(docs, paths, formats):
+            tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmps.append(tmp)
+            if fmt == "pdf":
+                write_hatch_pdf_pages(pages, tmp, hedef_kalinlik, stats)
+            else:
+                write_hatch_output(*pages[0], fmt, tmp, hedef_kalinlik, stats)
+        if stats is not None:
+            stats.check()
+        for tmp, path in zip(tmps, paths):
+            os.replace(tmp, path)
+    except BaseException:
+        for tmp in tmps:
+            try:
+                tmp.unlink()
+            except FileNotFoundError:
+                pass
+        raise
+    return list(paths)
 
 
 def process_pdf(
@@ -30,136 +863,370 @@ def process_pdf(
     tarama_acisi_derece: float = 45.0,
     yon: int = 1,
     output_dir: Optional[Union[str, Path]] = None,
-) -> Path:
+    bezier_tolerans: Optional[float] = None,
+    geometry_cache: Optional[DiskLRUCache] = None,
+    hafif_cikarim: bool = False,
+    snap_grid: Optional[float] = 0.001,
+    return_stats: bool = False,
+    progress: Optional[Callable[[ProgressEvent], None]] = None,
+    cancel: Optional[threading.Event] = None,
+    hatch_workers: Optional[int] = None,
+) -> Union[Path, Tuple[Path, ProcessStats]]:
+    # return_stats=True ise (çıktı, ProcessStats) döner; progress her aşama/tarama parçasında
+    # çağrılır, cancel set edilirse ProcessCancelled yükselir
+    stats = _new_stats(return_stats, progress, cancel)
+    dosya_adi = Path(dosya_adi)
+    cikti_adi = _output_path(dosya_adi, yon, output_dir)
+
+    geometry = load_geometry(
+        dosya_adi, hedef_kalinlik=hedef_kalinlik, bezier_adim=bezier_adim, buffer_eps=buffer_eps, bezier_tolerans=bezier_tolerans,
+        geometry_cache=geometry_cache, hafif_cikarim=hafif_cikarim, snap_grid=snap_grid, stats=stats,
+    )
+
+    spans = _hatch_configs(geometry, [{"TARAMA_ACISI_DERECE": tarama_acisi_derece}], tarama_araligi, stats=stats, hatch_workers=hatch_workers)[0]
+    out = _save_outputs([[(geometry, spans)]], [cikti_adi], hedef_kalinlik, stats)[0]
+    return (out, stats) if return_stats else out
+
+
+def process_pdf_multi(
+    dosya_adi: Union[str, Path],
+    configs: Sequence[dict],
+    hedef_kalinlik: float = 2.83,
+    tarama_araligi: int = 6,
+    bezier_adim: int = 20,
+    buffer_eps: float = 0.01,
+    output_dir: Optional[Union[str, Path]] = None,
+    bezier_tolerans: Optional[float] = None,
+    max_workers: Optional[int] = None,
+    geometry_cache: Optional[DiskLRUCache] = None,
+    hafif_cikarim: bool = False,
+    snap_grid: Optional[float] = 0.001,
+    return_stats: bool = False,
+    progress: Optional[Callable[[ProgressEvent], None]] = None,
+    cancel: Optional[threading.Event] = None,
+    hatch_workers: Optional[int] = None,
+    formats: Sequence[str] = ("pdf",),
+) -> Union[List[Path], Tuple[List[Path], ProcessStats]]:
+    """Geometriyi bir kez çıkarır, her {"TARAMA_ACISI_DERECE", "yon"} ayarı için bir çıktı üretir.
+
+    formats ("pdf", "svg", "dxf") verilirse her ayar için her biçim aynı taramadan
+    yazılır; dönüş sırası ayar, sonra biçim.
+
+    Açıların taraması thread'lerde paralel hesaplanır; PyMuPDF thread-safe
+    olmadığı için PDF yazımı ana thread'de sırayla yapılır.
+    """
+    stats = _new_stats(return_stats, progress, cancel)
     dosya_adi = Path(dosya_adi)
-    angle_deg = float(tarama_acisi_derece)
-    base = dosya_adi.stem
+    geometry = load_geometry(
+        dosya_adi, hedef_kalinlik=hedef_kalinlik, bezier_adim=bezier_adim, buffer_eps=buffer_eps, bezier_tolerans=bezier_tolerans,
+        geometry_cache=geometry_cache, hafif_cikarim=hafif_cikarim, snap_grid=snap_grid, stats=stats,
+    )
+
+    all_spans = _hatch_configs(geometry, configs, tarama_araligi, max_workers=max_workers, stats=stats, hatch_workers=hatch_workers)
+
+    jobs = [(cfg, spans, fmt) for cfg, spans in zip(configs, all_spans) for fmt in formats]
+    paths = [_output_path(dosya_adi, cfg["yon"], output_dir, fmt) for cfg, _, fmt in jobs]
+    docs = [[(geometry, spans)] for _, spans, _ in jobs]
+    outputs = _save_outputs(docs, paths, hedef_kalinlik, stats, [fmt for _, _, fmt in jobs])
+    return (outputs, stats) if return_stats else outputs
+
+
+# ------------------------------------------------
+#  BELLEK İÇİ (bytes → bytes) MOD
+# ------------------------------------------------
+# Kaynak bytes/memoryview olarak açılır, çıktı bytes döner ya da verilen
+# tampona yazılır; hiçbir aşamada geçici dosya kullanılmaz.
+
+def process_pdf_bytes(
+    pdf_data: Union[bytes, bytearray, memoryview],
+    hedef_kalinlik: float = 2.83,
+    tarama_araligi: int = 6,
+    bezier_adim: int = 20,
+    buffer_eps: float = 0.01,
+    tarama_acisi_derece: float = 45.0,
+    bezier_tolerans: Optional[float] = None,
+    geometry_cache: Optional[DiskLRUCache] = None,
+    out: Optional[BinaryIO] = None,
+    hafif_cikarim: bool = False,
+    snap_grid: Optional[float] = 0.001,
+    return_stats: bool = False,
+    progress: Optional[Callable[[ProgressEvent], None]] = None,
+    cancel: Optional[threading.Event] = None,
+    hatch_workers: Optional[int] = None,
+):
+    # out verilirse çıktı oraya yazılır ve None döner; return_stats=True ise (sonuç, ProcessStats)
+    stats = _new_stats(return_stats, progress, cancel)
+    geometry = load_geometry(
+        pdf_data, hedef_kalinlik=hedef_kalinlik, bezier_adim=bezier_adim, buffer_eps=buffer_eps, bezier_tolerans=bezier_tolerans,
+        geometry_cache=geometry_cache, hafif_cikarim=hafif_cikarim, snap_grid=snap_grid, stats=stats,
+    )
+    spans = _hatch_configs(geometry, [{"TARAMA_ACISI_DERECE": tarama_acisi_derece}], tarama_araligi, stats=stats, hatch_workers=hatch_workers)[0]
+    if out is not None:
+        write_hatch_pdf(geometry, spans, out, hedef_kalinlik, stats)
+        result = None
+    else:
+        buf = io.BytesIO()
+        write_hatch_pdf(geometry, spans, buf, hedef_kalinlik, stats)
+        result = buf.getvalue()
+    return (result, stats) if return_stats else result
+
+
+def process_pdf_multi_bytes(
+    pdf_data: Union[bytes, bytearray, memoryview],
+    configs: Sequence[dict],
+    hedef_kalinlik: float = 2.83,
+    tarama_araligi: int = 6,
+    bezier_adim: int = 20,
+    buffer_eps: float = 0.01,
+    bezier_tolerans: Optional[float] = None,
+    max_workers: Optional[int] = None,
+    geometry_cache: Optional[DiskLRUCache] = None,
+    hafif_cikarim: bool = False,
+    snap_grid: Optional[float] = 0.001,
+    return_stats: bool = False,
+    output_cache: Optional[DiskLRUCache] = None,
+    pdf_hash: Optional[str] = None,
+    progress: Optional[Callable[[ProgressEvent], None]] = None,
+    cancel: Optional[threading.Event] = None,
+    hatch_workers: Optional[int] = None,
+    formats: Sequence[str] = ("pdf",),
+) -> Union[List[bytes], Tuple[List[bytes], ProcessStats]]:
+    # Her ayar × biçim için bir içerik (sıra: ayar, sonra biçim); output_cache'te bulunanlar
+    # hiç hesaplanmaz, taraması eksik olan ayarlar tek geometri geçişini paylaşır
+    stats = _new_stats(return_stats, progress, cancel)
+    jobs = [(i, fmt) for i in range(len(configs)) for fmt in formats]
+    outputs: List[Optional[bytes]] = [None] * len(jobs)
+    keys = None
+    if output_cache is not None:
+        with _stage(stats, "open"):
+            if pdf_hash is None:
+                pdf_hash = sha256_bytes(pdf_data)
+            base = output_cache_keys(
+                pdf_hash, configs, tarama_araligi=tarama_araligi,
+                hedef_kalinlik=hedef_kalinlik, bezier_adim=bezier_adim, buffer_eps=buffer_eps, bezier_tolerans=bezier_tolerans,
+                hafif_cikarim=hafif_cikarim, snap_grid=snap_grid,
+            )
+            # PDF anahtarı eski biçimde kalır
+            keys = [base[i] if fmt == "pdf" else f"{base[i]}|{fmt}" for i, fmt in jobs]
+            outputs = [output_cache.get(k) for k in keys]
+        if stats is not None:
+            stats.output_cache_hits = sum(o is not None for o in outputs)
+
+    missing = [j for j, o in enumerate(outputs) if o is None]
+    if missing:
+        geometry = load_geometry(
+            pdf_data, hedef_kalinlik=hedef_kalinlik, bezier_adim=bezier_adim, buffer_eps=buffer_eps, bezier_tolerans=bezier_tolerans,
+            geometry_cache=geometry_cache, hafif_cikarim=hafif_cikarim, snap_grid=snap_grid, stats=stats, pdf_hash=pdf_hash,
+        )
+        need = sorted({jobs[j][0] for j in missing})
+        spans_by_cfg = dict(zip(need, _hatch_configs(geometry, [configs[i] for i in need], tarama_araligi, max_workers=max_workers, stats=stats, hatch_workers=hatch_workers)))
+        for j in missing:
+            i, fmt = jobs[j]
+            buf = io.BytesIO()
+            write_hatch_output(geometry, spans_by_cfg[i], fmt, buf, hedef_kalinlik, stats)
+            outputs[j] = buf.getvalue()
+        if stats is not None:
+            stats.check()
+        if keys is not None:
+            for j in missing:
+                output_cache.set(keys[j], outputs[j])
+    return (outputs, stats) if return_stats else outputs
+
+
+# ------------------------------------------------
+#  ÇOK SAYFA / ÇOK BIÇAK
+# ------------------------------------------------
+# Sayfalar süreç havuzunda çıkarılıp şekillerine bölünür, şekil × ayar taramaları aynı
+# havuza dağıtılır; ana süreç yalnızca PDF'leri yazar (PyMuPDF nesneleri süreçler
+# arasında taşınmaz).
+
+def shape_output_name(dosya_adi: Union[str, Path], sayfa: int, sekil: int, yon: int) -> str:
+    return f"{Path(dosya_adi).stem}-s{sayfa + 1}-{sekil + 1}-{yon}.pdf"
+
+
+def _page_count(source: PdfSource) -> int:
+    doc = open_pdf(source)
+    try:
+        return doc.page_count
+    finally:
+        doc.close()
+
+
+def _page_shapes(source: PdfSource, page_index: int, params: dict, split: bool) -> dict:
+    # İşçi süreç: sayfa → şekiller; sonuç picklable (final_rect, WKB) listesi
+    try:
+        geometry = load_geometry(source, page_index=page_index, tum_sekiller=split, **params)
+    except KnifeTraceNotFound:
+        # Bıçak izi olmayan sayfa (kapak, açıklama vb.) atlanır; diğer hatalar çağırana çıkar
+        return {"page": page_index, "shapes": []}
+    shapes = split_shapes(geometry) if split else [geometry]
+    return {"page": page_index, "shapes": [(shape.final_rect, shapely.to_wkb(shape.poly_to_hatch)) for shape in shapes]}
+
+
+def _hatch_shape(final_rect, wkb: bytes, tarama_araligi: int, aci: float, hatch_workers: Optional[int]) -> np.ndarray:
+    # İşçi süreç: tek şekil × tek açı taraması
+    shape = DieLineGeometry(shapely.from_wkb(wkb), tuple(final_rect))
+    return compute_hatch(shape, tarama_araligi, aci, hatch_workers=hatch_workers)
+
+
+def _pool_map(ex: Optional[ProcessPoolExecutor], func: Callable, calls: Sequence[tuple]) -> list:
+    # ex None ise bu süreçte sırayla; sonuçlar çağrı sırasıyla, işçi hatası aynen yükselir
+    if ex is None:
+        return [func(*args) for args in calls]
+    futures = [ex.submit(func, *args) for args in calls]
+    return [f.result() for f in futures]
+
+
+def hatch_pages(
+    source: PdfSource,
+    configs: Sequence[dict],
+    hedef_kalinlik: float = 2.83,
+    tarama_araligi: int = 6,
+    bezier_adim: int = 20,
+    buffer_eps: float = 0.01,
+    bezier_tolerans: Optional[float] = None,
+    pages: Optional[Sequence[int]] = None,
+    split: bool = True,
+    max_workers: Optional[int] = None,
+    geometry_cache: Optional[DiskLRUCache] = None,
+    hafif_cikarim: bool = False,
+    snap_grid: Optional[float] = 0.001,
+    hatch_workers: Optional[int] = None,
+) -> List[Tuple[int, int, DieLineGeometry, List[np.ndarray]]]:
+    """(sayfa, şekil, geometri, ayar başına tarama) listesi; sayfa ve şekil sırasıyla.
+
+    Aynı süreç havuzunda önce sayfalar şekillerine ayrılır, sonra her şekil × ayar
+    taraması ayrı iş olarak dağıtılır; tek sayfalı montajlar da tüm işçileri kullanır.
+    Bıçak izi olmayan sayfalar atlanır, hiçbir sayfada yoksa KnifeTraceNotFound.
+    """
+    if pages is None:
+        pages = range(_page_count(source))
+    pages = list(pages)
+    if _is_stream(source):
+        source = bytes(source)
+    params = dict(
+        hedef_kalinlik=hedef_kalinlik, bezier_adim=bezier_adim, buffer_eps=buffer_eps,
+        bezier_tolerans=bezier_tolerans, geometry_cache=geometry_cache,
+        hafif_cikarim=hafif_cikarim, snap_grid=snap_grid,
+    )
+    angles = [float(cfg["TARAMA_ACISI_DERECE"]) for cfg in configs]
+    workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) if workers > 1 else nullcontext() as ex:
+        page_results = _pool_map(ex, _page_shapes, [(source, i, params, split) for i in pages])
+        shapes = [(res["page"], k, rect, wkb) for res in page_results for k, (rect, wkb) in enumerate(res["shapes"])]
+        if not shapes:
+            raise KnifeTraceNotFound(f"Bıçak izi bulunamadı ({len(pages)} sayfanın hiçbirinde).")
+        spans = _pool_map(ex, _hatch_shape, [(rect, wkb, tarama_araligi, a, hatch_workers) for _, _, rect, wkb in shapes for a in angles])
+
+    n = len(angles)
+    return [
+        (page, k, DieLineGeometry(shapely.from_wkb(wkb), tuple(rect)), spans[j * n:(j + 1) * n])
+        for j, (page, k, rect, wkb) in enumerate(shapes)
+    ]
+
+
+def process_pdf_pages(
+    dosya_adi: Union[str, Path],
+    configs: Sequence[dict],
+    hedef_kalinlik: float = 2.83,
+    tarama_araligi: int = 6,
+    bezier_adim: int = 20,
+    buffer_eps: float = 0.01,
+    output_dir: Optional[Union[str, Path]] = None,
+    per_shape: bool = False,
+    **kwargs,
+) -> List[Path]:
+    """Tüm sayfaları ve sayfadaki her ayrı bıçak şeklini tarar.
+
+    per_shape=False: her ayar için tek çok sayfalı PDF ("{ad}-{yon}.pdf", şekil başına bir sayfa).
+    per_shape=True: her şekil × ayar için ayrı PDF ("{ad}-s{sayfa}-{şekil}-{yon}.pdf").
+    Diğer anahtarlar (pages, split, max_workers, ...) hatch_pages'e geçer.
+    """
+    dosya_adi = Path(dosya_adi)
+    items = hatch_pages(
+        dosya_adi, configs, hedef_kalinlik=hedef_kalinlik, tarama_araligi=tarama_araligi,
+        bezier_adim=bezier_adim, buffer_eps=buffer_eps, **kwargs,
+    )
     out_dir = Path(output_dir) if output_dir else dosya_adi.parent
     out_dir.mkdir(parents=True, exist_ok=True)
-    cikti_adi = out_dir / f"{base}-{yon}.pdf"
+    docs, paths = _page_docs(items, configs, per_shape, dosya_adi)
+    return _save_outputs(docs, [out_dir / name for name in paths], hedef_kalinlik)
 
-    doc = fitz.open(str(dosya_adi))
-    try:
-        src_page = doc[0]
-        page_height = src_page.rect.height
-        paths = src_page.get_drawings()
 
-        # --- BIÇAK İZİ ARAMA STRATEJİSİ (Aynen Korundu) ---
-        bicak_izleri = [p for p in paths if p.get("width") is not None and abs(p["width"] - hedef_kalinlik) <= 0.1 and p["rect"].y1 < (page_height / 2)]
-        if not bicak_izleri:
-            bicak_izleri = [p for p in paths if p.get("width") is not None and abs(p["width"] - hedef_kalinlik) <= 0.1]
-        if not bicak_izleri:
-            bicak_izleri = [p for p in paths if p.get("width") is not None and 1 <= p["width"] <= 5]
-        if not bicak_izleri:
-            bicak_izleri = [p for p in paths if p["rect"].width > 50 or p["rect"].height > 50]
+def process_pdf_pages_bytes(
+    pdf_data: Union[bytes, bytearray, memoryview],
+    configs: Sequence[dict],
+    dosya_adi: str = "output.pdf",
+    hedef_kalinlik: float = 2.83,
+    tarama_araligi: int = 6,
+    bezier_adim: int = 20,
+    buffer_eps: float = 0.01,
+    per_shape: bool = False,
+    **kwargs,
+) -> List[Tuple[str, bytes]]:
+    # process_pdf_pages'in bellek içi karşılığı: (çıktı adı, PDF içeriği) listesi
+    items = hatch_pages(
+        pdf_data, configs, hedef_kalinlik=hedef_kalinlik, tarama_araligi=tarama_araligi,
+        bezier_adim=bezier_adim, buffer_eps=buffer_eps, **kwargs,
+    )
+    docs, names = _page_docs(items, configs, per_shape, dosya_adi)
+    outputs = []
+    for pages, name in zip(docs, names):
+        buf = io.BytesIO()
+        write_hatch_pdf_pages(pages, buf, hedef_kalinlik)
+        outputs.append((name, buf.getvalue()))
+    return outputs
 
-        if not bicak_izleri:
-            raise ValueError(f"Bıçak izi bulunamadı.")
 
-        try:
-            union_rect = fitz.Rect(bicak_izleri[0]["rect"])
-            for p in bicak_izleri[1:]: union_rect |= p["rect"]
-            final_rect = union_rect
-        except:
-            final_rect = src_page.rect
+def _page_docs(items, configs, per_shape: bool, dosya_adi):
+    # hatch_pages sonucunu çıktı dosyalarına dağıtır: (sayfa listeleri, dosya adları)
+    docs, names = [], []
+    if per_shape:
+        for page, k, shape, all_spans in items:
+            for cfg, spans in zip(configs, all_spans):
+                docs.append([(shape, spans)])
+                names.append(shape_output_name(dosya_adi, page, k, cfg["yon"]))
+    else:
+        for c, cfg in enumerate(configs):
+            docs.append([(shape, all_spans[c]) for _, _, shape, all_spans in items])
+            names.append(output_name(dosya_adi, cfg["yon"]))
+    return docs, names
+
 
-        new_doc = fitz.open()
+# ------------------------------------------------
+#  İLERLEME OLAYLARI (generator)
+# ------------------------------------------------
+
+def iter_process(func: Callable, *args, **kwargs) -> Iterator[ProgressEvent]:
+    """`func`'ı (process_pdf, process_pdf_multi, *_bytes) arka planda çalıştırıp olaylarını üretir.
+
+    Son olay kind="done" olup sonucu `result` içinde taşır. Generator erken
+    kapatılırsa (break, close, Streamlit rerun) iş iptal edilir ve beklenir.
+    """
+    events: "queue.Queue" = queue.Queue()
+    cancel = threading.Event()
+    outcome = {}
+
+    def run():
         try:
-            new_page = new_doc.new_page(width=final_rect.width + 2, height=final_rect.height + 2)
-            offset = final_rect.tl - fitz.Point(1, 1)
-
-            all_lines = []
-            for p in bicak_izleri:
-                for item in p["items"]:
-                    if item[0] == "l":
-                        a, b = item[1] - offset, item[2] - offset
-                        all_lines.append(LineString([(a.x, a.y), (b.x, b.y)]))
-                    elif item[0] == "c":
-                        p0, p1, p2, p3 = [v - offset for v in item[1:5]]
-                        all_lines.append(LineString(bezier_points(p0, p1, p2, p3, n=int(bezier_adim))))
-
-            merged = unary_union(all_lines)
-            polys = list(polygonize(merged))
-
-            if not polys:
-                refined = merged.buffer(1.2).buffer(-1.1)
-                if refined.geom_type == 'Polygon':
-                    polys = [refined]
-                elif hasattr(refined, 'geoms'):
-                    polys = [g for g in refined.geoms if g.geom_type == 'Polygon']
-
-            if not polys:
-                poly_to_hatch = box(*merged.bounds)
-            else:
-                # --- KRİTİK DÜZELTME: İÇ ÜÇGENLERİ DELİK OLARAK TANIMLA ---
-                # 1. En büyük poligonu dış çerçeve seç
-                outer_poly = max(polys, key=lambda p: p.area)
-                # 2. Diğer tüm poligonları (üçgenleri) "iç boşluk/delik" olarak belirle
-                inner_holes = [p for p in polys if p != outer_poly and p.within(outer_poly)]
-
-                # 3. Dış çerçeveden iç boşlukları çıkar (Böylece içleri taranmaz)
-                if inner_holes:
-                    poly_to_hatch = outer_poly.difference(unary_union(inner_holes))
-                else:
-                    poly_to_hatch = outer_poly
-
-            poly_to_hatch = poly_to_hatch.buffer(float(buffer_eps))
-
-            # Çizim (Dış ve İç Hatları Çiz)
-            shape_outline = new_page.new_shape()
-
-            def draw_poly_with_holes(geom):
-                if geom.geom_type == 'Polygon':
-                    # Dış Sınır
-                    coords = list(geom.exterior.coords)
-                    for i in range(len(coords)-1):
-                        shape_outline.draw_line(fitz.Point(*coords[i]), fitz.Point(*coords[i+1]))
-                    # İç Boşluk Sınırları (Üçgenler)
-                    for interior in geom.interiors:
-                        coords = list(interior.coords)
-                        for i in range(len(coords)-1):
-                            shape_outline.draw_line(fitz.Point(*coords[i]), fitz.Point(*coords[i+1]))
-                elif hasattr(geom, 'geoms'):
-                    for g in geom.geoms: draw_poly_with_holes(g)
-
-            draw_poly_with_holes(poly_to_hatch)
-            shape_outline.finish(color=(0, 0, 0), width=hedef_kalinlik)
-            shape_outline.commit()
-
-            # Tarama (Sadece poligonun "dolu" kısımlarını tara)
-            shape_hatch = new_page.new_shape()
-            diag = math.sqrt(new_page.rect.width**2 + new_page.rect.height**2)
-            angle_rad = math.radians(angle_deg)
-            dx, dy = math.cos(angle_rad), math.sin(angle_rad)
-            nx, ny = -dy, dx
-
-            step = int(tarama_araligi)
-            for i in range(-int(diag), int(diag), step):
-                cx, cy = nx * i + new_page.rect.width/2, ny * i + new_page.rect.height/2
-                line = LineString([(cx - dx * diag, cy - dy * diag), (cx + dx * diag, cy + dy * diag)])
-
-                try:
-                    # Difference ile oluşturduğumuz için iç boşluklarda kesişim (intersection) oluşmaz
-                    inter = poly_to_hatch.intersection(line)
-                    if inter.is_empty: continue
-
-                    def draw_it(g):
-                        if g.geom_type == "LineString":
-                            pts = list(g.coords)
-                            shape_hatch.draw_line(fitz.Point(*pts[0]), fitz.Point(*pts[-1]))
-                        elif hasattr(g, 'geoms'):
-                            for sub_g in g.geoms: draw_it(sub_g)
-
-                    draw_it(inter)
-                except:
-                    continue
-
-            shape_hatch.finish(color=(0, 0, 0), width=0.7)
-            shape_hatch.commit()
-            new_doc.save(str(cikti_adi))
+            outcome["result"] = func(*args, progress=events.put, cancel=cancel, **kwargs)
+        except BaseException as e:
+            outcome["error"] = e
         finally:
-            new_doc.close()
+            events.put(None)
+
+    worker = threading.Thread(target=run, name="process-pdf", daemon=True)
+    worker.start()
+    try:
+        while True:
+            event = events.get()
+            if event is None:
+                break
+            yield event
     finally:
-        doc.close()
+        cancel.set()
+        worker.join()
+    if "error" in outcome:
+        raise outcome["error"]
+    yield ProgressEvent("done", "done", result=outcome["result"])
 
-    return cikti_adi
@@ -5,6 +5,7 @@ import os
 from pathlib import Path
 import sys
 import requests
+import time
 
 # ------------------------------------------------
 #  GENEL AYARLAR & SIDEBAR / MENÜ GİZLEME
@@ -101,16 +102,16 @@ with st.container():
 
 
 
-import io
-import zipfile
-import tempfile
 from pathlib import Path
 
 import streamlit as st
 
 # ⚠️ code.py adını kullanma (stdlib ile çakışır)
 # process_pdf senin fonksiyonun burada olmalı:
-from pages.convert_pdf import process_pdf
+from pages.convert_pdf import process_pdf_multi_bytes, default_geometry_cache, default_output_cache, output_name, iter_process, OUTPUT_FORMATS
+from disk_cache import upload_hash
+from batch_jobs import BatchJob, cleanup_jobs
+from zip_spool import SpooledZip
 
 
 st.set_page_config(page_title="PDF Hatch", layout="centered")
@@ -128,6 +129,16 @@ JOB_CONFIGS = [
     {"TARAMA_ACISI_DERECE": 135, "yon": 1},
 ]
 
+# Batch: aynı anda en fazla BATCH_WORKERS dosya ayrı süreçlerde işlenir; takılan ya da
+# belleği şişiren dosya öldürülür ve hatalar listesine düşer, diğerleri devam eder
+BATCH_WORKERS = max(1, min(4, os.cpu_count() or 1))
+JOB_TIMEOUT_S = float(os.environ.get("BATCH_JOB_TIMEOUT_S", 180))
+JOB_MEMORY_MB = int(os.environ.get("BATCH_JOB_MEMORY_MB", 2048))
+
+# ZIP sıkıştırma seviyesi: None → PDF'ler olduğu gibi saklanır (zaten sıkıştırılmış)
+ZIP_SEVIYE = None
+
+
 tab_single, tab_batch = st.tabs(["Tek PDF", "Batch (çoklu PDF)"])
 
 
@@ -143,10 +154,18 @@ with tab_single:
         key="single_uploader"
     )
 
+    formats = st.multiselect(
+        "Çıktı biçimleri",
+        list(OUTPUT_FORMATS),
+        default=["pdf"],
+        key="single_formats",
+        help="SVG / DXF kesim plotteri ve CAD için; hepsi aynı taramadan yazılır",
+    )
+
     run_single = st.button(
         "İşlemi Başlat (Tek PDF)",
         type="primary",
-        disabled=not uploaded,
+        disabled=not uploaded or not formats,
         key="run_single"
     )
 
@@ -155,42 +174,58 @@ with tab_single:
             st.error("PDF seçilmedi.")
             st.stop()
 
-        zip_buffer = io.BytesIO()
-
-        with st.spinner("İşleniyor..."):
-            with tempfile.TemporaryDirectory() as td:
-                td = Path(td)
-
-                safe_name = Path(uploaded.name).name
-                tmp_input = td / safe_name
-                tmp_input.write_bytes(uploaded.getbuffer())
-
-                with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zf:
-                    for cfg in JOB_CONFIGS:
-                        out_path = process_pdf(
-                            dosya_adi=str(tmp_input),
-                            hedef_kalinlik=HEDEF_KALINLIK,
-                            tarama_araligi=TARAMA_ARALIGI,
-                            bezier_adim=BEZIER_ADIM,
-                            buffer_eps=BUFFER_EPS,
-                            tarama_acisi_derece=cfg["TARAMA_ACISI_DERECE"],
-                            yon=cfg["yon"],
-                        )
-
-                        out_path = Path(out_path)
-                        zf.write(out_path, arcname=out_path.name)
-
-        zip_buffer.seek(0)
+        sz = SpooledZip(compresslevel=ZIP_SEVIYE)
+        progress = st.progress(0.0)
+        status = st.empty()
 
-        st.success("Tamamlandı. 2 çıktı birlikte indirilebilir.")
+        # Yükleme bellekte işlenir, çıktılar doğrudan ZIP'e yazılır (geçici dosya yok)
+        safe_name = Path(uploaded.name).name
+
+        with sz:
+            # Geometri bir kez çıkarılır, tüm açılar aynı poligondan taranır. İş arka
+            # planda yürür, aşama/tarama olayları buraya akar; rerun generator'ı kapatır
+            # ve iş iptal edilir
+            events = iter_process(
+                process_pdf_multi_bytes,
+                uploaded.getbuffer(),
+                configs=JOB_CONFIGS,
+                hedef_kalinlik=HEDEF_KALINLIK,
+                tarama_araligi=TARAMA_ARALIGI,
+                bezier_adim=BEZIER_ADIM,
+                buffer_eps=BUFFER_EPS,
+                geometry_cache=default_geometry_cache(),
+                output_cache=default_output_cache(),
+                pdf_hash=upload_hash(uploaded, st.session_state),
+                formats=tuple(formats),
+            )
+            try:
+                for ev in events:
+                    progress.progress(ev.fraction)
+                    if ev.kind == "chunk":
+                        status.write(f"Tarama {ev.aci:g}°: {ev.done}/{ev.total}")
+                    elif ev.kind == "start":
+                        status.write(f"Aşama: {ev.stage}")
+                    elif ev.kind == "done":
+                        out_datas = ev.result
+            finally:
+                events.close()
+
+            names = [output_name(safe_name, cfg["yon"], fmt) for cfg in JOB_CONFIGS for fmt in formats]
+            for name, data in zip(names, out_datas):
+                sz.add(name, data)
+            del out_datas
+        status.empty()
+
+        st.success(f"Tamamlandı. {len(names)} çıktı birlikte indirilebilir.")
 
         st.download_button(
             label="Çıktıları indir (ZIP)",
-            data=zip_buffer.getvalue(),
+            data=sz.download_data(),
             file_name=f"{Path(uploaded.name).stem}_outputs.zip",
             mime="application/zip",
             key="single_zip_download",
         )
+        sz.close()
 
 
 
@@ -215,56 +250,44 @@ with tab_batch:
             st.error("PDF seçilmedi.")
             st.stop()
 
+        params = dict(
+            hedef_kalinlik=HEDEF_KALINLIK,
+            tarama_araligi=TARAMA_ARALIGI,
+            bezier_adim=BEZIER_ADIM,
+            buffer_eps=BUFFER_EPS,
+        )
+        cleanup_jobs()
+        # Aynı dosya + ayar kümesi aynı işe düşer: önceden biten çiftler yeniden işlenmez
+        job = BatchJob.create(
+            [(Path(uf.name).name, uf.getvalue()) for uf in uploaded_files], JOB_CONFIGS, params,
+            hashes=[upload_hash(uf, st.session_state) for uf in uploaded_files],
+        )
+        st.session_state["batch_job_id"] = job.job_id
+
+    # İş, sayfa çalışmasından bağımsız yürür; her rerun'da oturumdaki işe yeniden bağlanılır
+    job_id = st.session_state.get("batch_job_id")
+    job = BatchJob.open(job_id) if job_id else None
+
+    if job is not None:
+        job.start(max_workers=BATCH_WORKERS, timeout=JOB_TIMEOUT_S, memory_mb=JOB_MEMORY_MB)
+
+        n_files = len(job.manifest["files"])
+        st.caption(f"İş {job.job_id} | {n_files} dosya, en fazla {BATCH_WORKERS} paralel işlem | "
+                   f"açılar={[c['TARAMA_ACISI_DERECE'] for c in job.configs]}")
         progress = st.progress(0)
         status = st.empty()
 
-        zip_buffer = io.BytesIO()
-        ok_count = 0
-        fail_count = 0
-        failures = []
-
-        with tempfile.TemporaryDirectory() as td:
-            td = Path(td)
-
-            # input’ları temp’e yaz
-            input_paths = []
-            for uf in uploaded_files:
-                safe_name = Path(uf.name).name
-                p = td / safe_name
-                p.write_bytes(uf.getbuffer())
-                input_paths.append(p)
-
-            total_jobs = len(input_paths) * len(JOB_CONFIGS)
-            done = 0
-
-            with zipfile.ZipFile(zip_buffer, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-                for pdf_path in input_paths:
-                    for cfg in JOB_CONFIGS:
-                        try:
-                            status.write(f"İşleniyor: {pdf_path.name} | açı={cfg['TARAMA_ACISI_DERECE']} | yon={cfg['yon']}")
-
-                            out_path = process_pdf(
-                                dosya_adi=str(pdf_path),
-                                hedef_kalinlik=HEDEF_KALINLIK,
-                                tarama_araligi=TARAMA_ARALIGI,
-                                bezier_adim=BEZIER_ADIM,
-                                buffer_eps=BUFFER_EPS,
-                                tarama_acisi_derece=cfg["TARAMA_ACISI_DERECE"],
-                                yon=cfg["yon"],
-                            )
-
-                            out_path = Path(out_path)
-                            zf.write(out_path, arcname=out_path.name)
-                            ok_count += 1
-
-                        except Exception as e:
-                            fail_count += 1
-                            failures.append((pdf_path.name, cfg, str(e)))
-
-                        done += 1
-                        progress.progress(min(1.0, done / total_jobs))
-
-        zip_buffer.seek(0)
+        while True:
+            running = job.is_running()
+            ok_count, fail_count, total_jobs = job.reload().progress()
+            progress.progress(min(1.0, (ok_count + fail_count) / max(total_jobs, 1)))
+            status.write(f"Biten: {ok_count + fail_count}/{total_jobs}")
+            if not running:
+                break
+            time.sleep(0.5)
+
+        failures = job.failures()
+        stats_rows = job.stats_rows()
 
         st.success(f"Tamamlandı. Başarılı: {ok_count} | Hatalı: {fail_count}")
 
@@ -272,11 +295,23 @@ with tab_batch:
             with st.expander("Hatalar"):
                 for name, cfg, err in failures:
                     st.write(f"- {name} | açı={cfg['TARAMA_ACISI_DERECE']} | yon={cfg['yon']} -> {err}")
-
-        st.download_button(
-            "Çıktıları ZIP olarak indir",
-            data=zip_buffer.getvalue(),
-            file_name="pdf_outputs.zip",
-            mime="application/zip",
-            key="dl_zip",
-        )
+            if st.button("Hatalıları yeniden dene", key="retry_failed"):
+                job.retry_failed()
+                st.rerun()
+
+        if stats_rows:
+            # En yavaş dosyalar üstte: hangi aşamanın / hangi yedek kademenin süreyi aldığı görünür
+            with st.expander("İstatistikler (aşama süreleri ve geometri sayıları)"):
+                stats_df = pd.DataFrame(stats_rows).sort_values("toplam_s", ascending=False)
+                st.dataframe(stats_df, use_container_width=True)
+
+        # Arşiv iş bitince iş dizinine bir kez yazılır; rerun'larda aynı dosya sunulur
+        archive = job.archive(compresslevel=ZIP_SEVIYE)
+        with open(archive, "rb") as f:
+            st.download_button(
+                "Çıktıları ZIP olarak indir",
+                data=f,
+                file_name="pdf_outputs.zip",
+                mime="application/zip",
+                key="dl_zip",
+            )
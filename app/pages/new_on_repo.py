@@ -1,10 +1,16 @@
 import streamlit as st
 import fitz
-import numpy as np
-import cv2
 import io
 import requests
 from gcs import upload_pdf_to_gcs
+from disk_cache import upload_hash
+from pdf_boxes import (
+    box_thumbnail,
+    default_box_cache,
+    default_thumb_cache,
+    iter_pdf_boxes,
+    thumbnail_cache_key,
+)
 from urllib.parse import urlencode
 
 # Backend URL'iniz (Cloud Run adresi)
@@ -13,48 +19,20 @@ BACKEND_URL = "https://sesa-grafik-api-1003931228830.europe-southwest1.run.app/n
 # ==========================================
 # 1. ANALİZİ HAFIZAYA AL (Donmayı Önleyen Kısım)
 # ==========================================
-@st.cache_resource(show_spinner="Sayfalar taranıyor, lütfen bekleyin...")
-def get_all_pdf_boxes(pdf_bytes):
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    all_boxes = {}
-    MIN_AREA, MIN_W, MIN_H, MIN_SOLIDITY = 8000, 200, 200, 0.6
-
-    for pg_idx in range(len(doc)):
-        page = doc[pg_idx]
-        pix = page.get_pixmap(dpi=120, alpha=True)
-        img_data = np.frombuffer(pix.tobytes("png"), np.uint8)
-        img = cv2.imdecode(img_data, cv2.IMREAD_UNCHANGED)
-        if img is None:
-            continue
-
-        alpha = img[:, :, 3]
-        kernel = np.ones((5, 5), np.uint8)
-        thresh = cv2.threshold(alpha, 1, 255, cv2.THRESH_BINARY)[1]
-        thresh = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel, iterations=2)
-        contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-        bboxes = []
-        scale = 72 / 120
-        page_rect = page.rect
-
-        for cnt in contours:
-            x, y, w, h = cv2.boundingRect(cnt)
-            rect = fitz.Rect(x * scale, y * scale, (x + w) * scale, (y + h) * scale)
-
-            if rect.width > page_rect.width * 0.9 or rect.height > page_rect.height * 0.9:
-                continue
-
-            solidity = float(cv2.contourArea(cnt)) / (w * h) if (w * h) > 0 else 0
+def iter_page_boxes(pdf_bytes, pdf_hash):
+    # Önbellekte yoksa sayfalar paralel taranır ve sayfa sırasıyla, hazır oldukça gelir;
+    # böylece ilk sayfanın kutuları diğer sayfalar beklenmeden çizilir
+    return iter_pdf_boxes(pdf_bytes, ordered=True, cache=default_box_cache(), pdf_hash=pdf_hash)
 
-            if (rect.width * rect.height) > MIN_AREA and rect.width > MIN_W and rect.height > MIN_H:
-                if solidity > MIN_SOLIDITY:
-                    bboxes.append(rect)
 
-        bboxes.sort(key=lambda r: (r.y0, r.x0))
-        all_boxes[pg_idx] = bboxes
-
-    doc.close()
-    return all_boxes
+def thumbnail(doc, pdf_hash, pg_idx, box):
+    cache = default_thumb_cache()
+    key = thumbnail_cache_key(pdf_hash, pg_idx, box)
+    png = cache.get(key)
+    if png is None:
+        png = box_thumbnail(doc, pg_idx, box)
+        cache.set(key, png)
+    return png
 
 
 # ==========================================
@@ -101,8 +79,11 @@ if uploaded:
     else:
         gcs_uri = st.session_state["gcs_uri"]
 
-    all_boxes_map = get_all_pdf_boxes(pdf_bytes)
+    pdf_hash = upload_hash(uploaded, st.session_state)
     doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    # Sayfa sayısı tarama başlamadan okunur: döngüde işçiler render ederken MuPDF'e dokunulmaz
+    sayfa_sayisi = len(doc)
+    tarama_durumu = st.empty()
 
     # ==========================================
     # FORM: seçim + 2 buton
@@ -112,7 +93,8 @@ if uploaded:
 
         selected_boxes_data = []
 
-        for pg_idx, boxes in all_boxes_map.items():
+        for pg_idx, boxes in iter_page_boxes(pdf_bytes, pdf_hash):
+            tarama_durumu.caption(f"Sayfalar taranıyor... {pg_idx + 1}/{sayfa_sayisi}")
             if not boxes:
                 continue
 
@@ -121,14 +103,14 @@ if uploaded:
 
             for i, box in enumerate(boxes):
                 with cols[i % 2]:
-                    pix_crop = doc[pg_idx].get_pixmap(matrix=fitz.Matrix(0.3, 0.3), clip=box)
-                    st.image(pix_crop.tobytes("png"))
+                    st.image(thumbnail(doc, pdf_hash, pg_idx, box))
 
                     cb_key = f"{pg_idx}_{i}"
                     if st.checkbox(f"Seç: Sayfa {pg_idx + 1}-ID {i}", key=f"check_{cb_key}"):
                         selected_boxes_data.append({"pg": pg_idx, "box": box})
 
             st.divider()
+        tarama_durumu.empty()
 
         # ✅ Backend'e gidecek payload'ı üret (BOŞLUKSUZ '|' delimiter)
         # ✅ Backend'e gidecek payload'ı üret (Sayfa No + Koordinat formatı)
@@ -224,4 +206,7 @@ if uploaded:
         st.subheader("🧾 Son gönderilen RAW body (session_state)")
         st.code(st.session_state["last_raw_body"], language="text")
 
+    with st.expander("Önbellek durumu"):
+        st.json({"kutular": default_box_cache().stats(), "kucuk_resimler": default_thumb_cache().stats()})
+
     doc.close()
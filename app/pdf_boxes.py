@@ -0,0 +1,602 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import fitz
+import numpy as np
+import shapely
+
+from bezier import flatten_cubics
+from disk_cache import CACHE_ROOT, DiskLRUCache, sha256_bytes
+
+# ------------------------------------------------
+#  AMBALAJ BÖLGESİ TESPİTİ (new_on_repo)
+# ------------------------------------------------
+# Sayfa alfa kanalıyla render edilir; dolu pikseller kapatma (close) ile
+# birleştirilip dış konturlar bulunur, küçük / seyrek / sayfa boyu kutular elenir.
+# Alfa düzlemi pixmap belleğinden doğrudan okunur (PNG kodla-çöz yok); gri+alfa
+# render RGBA ile aynı alfayı verir, tampon yarı boyuttadır.
+#
+# Çok sayfalı dosyalarda sayfalar bir iş parçacığı havuzuna dağıtılır; her işçi
+# kendi fitz.Document'ını açar. PyMuPDF ayrı belgelerle bile iş parçacığı
+# güvenli olmadığından MuPDF çağrıları (açma + render) tek kilitle sıralanır,
+# GIL'i bırakan OpenCV kısmı (eşik, kapatma, kontur) paralel koşar; böylece bir
+# sayfanın render'ı öncekinin kontur aşamasıyla örtüşür.
+#
+# Vektör yolu (method="vector") render etmez: çizimlerin, görsellerin ve
+# kelimelerin kutuları STRtree ile kümelenir, boyutu yetmeyen kümeler elenir,
+# kalanlarda gerçek şekiller birleştirilip aynı kapatma (buffer +r / -r) ve dış
+# kontur adımları vektörde uygulanır; filtreler rasterdakiyle aynıdır. Kırpma
+# yolları kutularıyla (scissor) uygulanır. Maskeli görsel içeren, alanının büyük
+# kısmı görsel olan ya da görselle birlikte kırpma içeren sayfalar rastera düşer.
+# Varsayılan yöntem vektördür; BOX_METHOD=raster her sayfayı render ettirir.
+#
+# Büyük sayfalarda (A1/A0 step-and-repeat) raster yol önce COARSE_DPI'da tüm
+# sayfayı tarar: dolu pikseller kapatma eriminin iki katı genişletilip bağlı
+# bileşenlere ayrılır, her bileşenin kutusu bir aday bölgedir. Bölgeler arası
+# boşluk kapatma erimini aştığından her bölge tam çözünürlükte ayrı ayrı
+# işlenebilir; boyutu filtreleri geçemeyecek bölgeler hiç render edilmez.
+# Render'lar yatay şeritler halinde alınır; bellek BOX_MEMORY_MB ile sınırlıdır (tüm işçilerin toplamı),
+# sınıra sığmayan tek bir bölge sığan en yüksek DPI'da işlenir.
+#
+# Sonuçlar iki katmanlı önbellekte tutulur (BoxCache): süreç içi bayt sınırlı
+# LRU + oturumlar ve yeniden başlatmalar arası paylaşılan DiskLRUCache. Anahtar
+# yükleme başına bir kez hesaplanan içerik hash'idir; içerik adresli olduğundan
+# kayıtlar bayatlamaz, yalnızca boyut sınırıyla atılır.
+
+BOX_DPI = 120
+MIN_AREA, MIN_W, MIN_H, MIN_SOLIDITY = 8000, 200, 200, 0.6
+MAX_PAGE_FRAC = 0.9
+CLOSE_KERNEL = np.ones((5, 5), np.uint8)
+CLOSE_ITER = 2
+# Kapatmanın vektör karşılığı: 5x5 çekirdek × 2 tekrar = 4 px yarıçap (pt cinsinden)
+CLOSE_REACH_PT = (CLOSE_KERNEL.shape[0] // 2) * CLOSE_ITER * 72 / BOX_DPI
+VECTOR_MAX_IMAGE_FRAC = 0.5
+BEZIER_BOX_ADIM = 8
+BOX_METHODS = ("vector", "raster")
+BOX_METHOD = os.environ.get("BOX_METHOD", "vector")
+BOX_MEMORY_MB = float(os.environ.get("BOX_MEMORY_MB", 128))
+COARSE_DPI = 30
+# Bu kadar pikselden büyük sayfalar kaba-ince taranır (~A2, 120 DPI)
+COARSE_MIN_PX = 6_000_000
+# Piksel başına çalışma belleği: alfa + eşik + kapatma + kontur kopyası + şerit pixmap'i (gri+alfa)
+WORK_BYTES_PER_PX = 6
+BAND_PAD_PX = 2
+BOX_CACHE_VERSION = 2
+BOX_CACHE_MEM_BYTES = int(float(os.environ.get("BOX_CACHE_MEM_MB", 32)) * 1024 * 1024)
+BOX_CACHE_MAX_BYTES = int(float(os.environ.get("BOX_CACHE_MAX_MB", 128)) * 1024 * 1024)
+BOX_WORKERS = int(os.environ.get("BOX_WORKERS", min(4, os.cpu_count() or 1)))
+
+_FITZ_LOCK = threading.Lock()
+
+
+def page_alpha(page: fitz.Page, dpi: float = BOX_DPI, clip=None) -> np.ndarray:
+    """Sayfanın alfa düzlemi (h, w) uint8; pixmap örneklerinin üzerinde bir görünümden kopyalanır."""
+    return _alpha_pixmap(page, dpi, clip)[0]
+
+
+def _alpha_pixmap(page: fitz.Page, dpi: float, clip=None) -> Tuple[np.ndarray, fitz.IRect]:
+    zoom = dpi / 72
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=True, colorspace=fitz.csGRAY, clip=clip)
+    samples = np.frombuffer(pix.samples_mv, np.uint8).reshape(pix.h, pix.stride)
+    # Son kanal alfa; OpenCV bitişik dizi ister, kopya yalnızca tek düzlem kadardır.
+    # samples_mv pixmap'i canlı tutmaz: kopya pix serbest kalmadan alınmalı
+    return np.ascontiguousarray(samples[:, pix.n - 1 : pix.w * pix.n : pix.n]), fitz.IRect(pix.irect)
+
+
+def page_irect(page_rect: fitz.Rect, dpi: float) -> fitz.IRect:
+    # Tam sayfa render'ının cihaz pikseli kutusu (MuPDF gibi dışa yuvarlanır)
+    zoom = dpi / 72
+    return (page_rect * fitz.Matrix(zoom, zoom)).round()
+
+
+def render_alpha(page: fitz.Page, dpi: float, irect: fitz.IRect, max_bytes: Optional[int] = None) -> np.ndarray:
+    """Cihaz pikseli `irect` bölgesinin alfa düzlemi; pixmap'ler en fazla `max_bytes` olan yatay şeritlerle alınır.
+
+    Şeritler birkaç piksel taşırılarak render edilir (kenarda kırpılmış kenar yumuşatma olmasın).
+    """
+    zoom = dpi / 72
+    out = np.zeros((irect.height, irect.width), np.uint8)
+    row_bytes = 2 * (irect.width + 2 * BAND_PAD_PX)
+    band = irect.height if not max_bytes else max(1, int(max_bytes) // row_bytes - 2 * BAND_PAD_PX)
+    for y0 in range(irect.y0, irect.y1, band):
+        y1 = min(irect.y1, y0 + band)
+        clip = fitz.Rect(irect.x0 - BAND_PAD_PX, y0 - BAND_PAD_PX, irect.x1 + BAND_PAD_PX, y1 + BAND_PAD_PX) / zoom
+        with _FITZ_LOCK:
+            a, got = _alpha_pixmap(page, dpi, clip)
+        # Şeridin bölgeye düşen kısmı
+        ty0, ty1 = max(got.y0, y0), min(got.y1, y1)
+        tx0, tx1 = max(got.x0, irect.x0), min(got.x1, irect.x1)
+        if ty1 > ty0 and tx1 > tx0:
+            out[ty0 - irect.y0 : ty1 - irect.y0, tx0 - irect.x0 : tx1 - irect.x0] = \
+                a[ty0 - got.y0 : ty1 - got.y0, tx0 - got.x0 : tx1 - got.x0]
+    return out
+
+
+def boxes_from_alpha(
+    alpha: np.ndarray,
+    page_rect: fitz.Rect,
+    dpi: float = BOX_DPI,
+    origin: Tuple[int, int] = (0, 0),
+    close_iter: int = CLOSE_ITER,
+) -> List[fitz.Rect]:
+    """origin: alfa düzleminin sayfadaki sol üst köşesi (cihaz pikseli; bölge render'ları için)."""
+    thresh = cv2.threshold(alpha, 1, 255, cv2.THRESH_BINARY)[1]
+    thresh = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, CLOSE_KERNEL, iterations=close_iter)
+    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    bboxes = []
+    scale = 72 / dpi
+    for cnt in contours:
+        x, y, w, h = cv2.boundingRect(cnt)
+        x, y = x + origin[0], y + origin[1]
+        rect = fitz.Rect(x * scale, y * scale, (x + w) * scale, (y + h) * scale)
+
+        if rect.width > page_rect.width * MAX_PAGE_FRAC or rect.height > page_rect.height * MAX_PAGE_FRAC:
+            continue
+
+        solidity = float(cv2.contourArea(cnt)) / (w * h) if (w * h) > 0 else 0
+
+        if (rect.width * rect.height) > MIN_AREA and rect.width > MIN_W and rect.height > MIN_H:
+            if solidity > MIN_SOLIDITY:
+                bboxes.append(rect)
+
+    bboxes.sort(key=lambda r: (r.y0, r.x0))
+    return bboxes
+
+
+def _path_shapes(d: dict):
+    """Bir çizim yolunun mürekkep alanı: dolgulu alt yollar poligon, kontur çizgiler kalınlığınca.
+
+    "re"/"qu" ve closePath'li alt yollar kapalı halka olarak çizilir (çerçevenin
+    dördüncü kenarı kaybolmaz); yol bir kırpma altındaysa şekiller "clip" kutusuna kırpılır.
+    """
+    subpaths, cur = [], None  # (noktalar, kapalı mı)
+    for item in d["items"]:
+        op = item[0]
+        if op == "re":
+            r = item[1]
+            subpaths.append((np.array([(r.x0, r.y0), (r.x1, r.y0), (r.x1, r.y1), (r.x0, r.y1)]), True))
+            cur = None
+            continue
+        if op == "qu":
+            q = item[1]
+            subpaths.append((np.array([tuple(q.ul), tuple(q.ur), tuple(q.lr), tuple(q.ll)]), True))
+            cur = None
+            continue
+        if op == "l":
+            pts = np.array([tuple(item[1]), tuple(item[2])])
+        elif op == "c":
+            pts = flatten_cubics(np.array([[tuple(pt) for pt in item[1:5]]]), BEZIER_BOX_ADIM)[0]
+        else:
+            continue
+        if cur is not None and np.allclose(cur[-1][-1], pts[0]):
+            cur.append(pts[1:])
+        else:
+            cur = [pts]
+            subpaths.append((cur, False))
+    close_path = bool(d.get("closePath"))
+    rings = []
+    for sp, closed in subpaths:
+        pts = np.concatenate(sp) if isinstance(sp, list) else sp
+        rings.append((pts, closed or close_path or (len(pts) > 2 and np.allclose(pts[0], pts[-1]))))
+
+    shapes = []
+    kind = d.get("type") or ""
+    if "f" in kind and d.get("fill_opacity", 1) > 0:
+        polys = [shapely.polygons(r) for r, _ in rings if len(r) >= 3]
+        shapes.extend(shapely.make_valid(np.array(polys, dtype=object)) if polys else [])
+    if "s" in kind and d.get("stroke_opacity", 1) > 0:
+        half = max(float(d.get("width") or 0), 1.0) / 2
+        lines = [
+            shapely.linearrings(r) if closed and len(r) >= 3 else shapely.linestrings(r)
+            for r, closed in rings if len(r) >= 2
+        ]
+        shapes.extend(shapely.buffer(np.array(lines, dtype=object), half) if lines else [])
+    if d.get("clip") is not None and shapes:
+        shapes = list(shapely.clip_by_rect(np.array(shapes, dtype=object), *d["clip"]))
+    return shapes
+
+
+def _page_items(page: fitz.Page):
+    """(kutular (n, 4), şekil üreticileri) ya da raster gereken sayfada None.
+
+    Çizimler kırpma yollarının kutusuna (scissor) kırpılır. Görsel kutuları kırpmayı
+    bilmediğinden hem kırpma hem görsel içeren sayfa rastera bırakılır.
+    """
+    page_area = abs(page.rect)
+    images = page.get_image_info()
+    if any(img.get("has-mask") for img in images):
+        return None
+    image_rects = [fitz.Rect(img["bbox"]) & page.rect for img in images]
+    if sum(abs(r) for r in image_rects) > VECTOR_MAX_IMAGE_FRAC * page_area:
+        return None
+
+    rects, makers = [], []
+    clips = []  # (seviye, scissor): seviyesi daha büyük öğeler bu kutuya kırpılır
+    for d in page.get_drawings(extended=True):
+        kind = d.get("type")
+        level = d.get("level", 0)
+        while clips and clips[-1][0] >= level:
+            clips.pop()
+        if kind == "clip":
+            if images:
+                return None
+            clips.append((level, fitz.Rect(d["scissor"])))
+            continue
+        if kind == "group":
+            continue
+        r = fitz.Rect(d["rect"])
+        if "s" in (kind or ""):
+            half = max(float(d.get("width") or 0), 1.0) / 2
+            r = r + (-half, -half, half, half)
+        if clips:
+            scissor = clips[-1][1]
+            r &= scissor
+            if r.is_empty:
+                continue
+            d = dict(d, clip=tuple(scissor))
+        rects.append(tuple(r))
+        makers.append(d)
+    for r in image_rects:
+        rects.append(tuple(r))
+        makers.append(r)
+    for w in page.get_text("words"):
+        rects.append(w[:4])
+        makers.append(fitz.Rect(w[:4]))
+    return np.array(rects, dtype=float).reshape(-1, 4), makers
+
+
+def boxes_from_items(rects: np.ndarray, makers: list, page_rect: fitz.Rect) -> List[fitz.Rect]:
+    # Sayfa dışı parçalar rasterda görünmez
+    rects = rects.copy()
+    rects[:, [0, 2]] = rects[:, [0, 2]].clip(page_rect.x0, page_rect.x1)
+    rects[:, [1, 3]] = rects[:, [1, 3]].clip(page_rect.y0, page_rect.y1)
+    keep = (rects[:, 2] > rects[:, 0]) | (rects[:, 3] > rects[:, 1])
+    rects, makers = rects[keep], [m for m, k in zip(makers, keep) if k]
+    if not len(rects):
+        return []
+
+    # 1) Kaba kümeler: kapatma erimi kadar büyütülmüş kutuların birleşimi
+    reach = CLOSE_REACH_PT
+    grown = shapely.box(rects[:, 0] - reach, rects[:, 1] - reach, rects[:, 2] + reach, rects[:, 3] + reach)
+    clusters = shapely.get_parts(shapely.union_all(grown))
+    item_idx, cluster_idx = shapely.STRtree(clusters).query(grown, predicate="within")
+
+    bboxes = []
+    for c in range(len(clusters)):
+        members = item_idx[cluster_idx == c]
+        x0, y0 = rects[members, :2].min(axis=0)
+        x1, y1 = rects[members, 2:].max(axis=0)
+        w, h = x1 - x0, y1 - y0
+        # Küme içindeki her kontur kümenin kutusuna sığar; küme yetmiyorsa hiçbiri yetmez
+        if w * h <= MIN_AREA or w <= MIN_W or h <= MIN_H:
+            continue
+
+        # 2) Gerçek şekiller + kapatma + dış kontur (delikler dolu)
+        shapes = []
+        for i in members:
+            m = makers[i]
+            shapes.extend(_path_shapes(m) if isinstance(m, dict) else [shapely.box(*m)])
+        ink = shapely.clip_by_rect(shapely.union_all(shapes), *page_rect)
+        closed = shapely.buffer(shapely.buffer(ink, reach, join_style="mitre"), -reach, join_style="mitre")
+        for part in shapely.get_parts(closed):
+            if shapely.get_type_id(part) != 3:
+                continue
+            bx0, by0, bx1, by1 = part.bounds
+            rect = fitz.Rect(bx0, by0, bx1, by1)
+            if rect.width > page_rect.width * MAX_PAGE_FRAC or rect.height > page_rect.height * MAX_PAGE_FRAC:
+                continue
+            area = rect.width * rect.height
+            solidity = shapely.area(shapely.polygons(shapely.get_exterior_ring(part))) / area if area > 0 else 0
+            if area > MIN_AREA and rect.width > MIN_W and rect.height > MIN_H and solidity > MIN_SOLIDITY:
+                bboxes.append(rect)
+
+    bboxes.sort(key=lambda r: (r.y0, r.x0))
+    return bboxes
+
+
+def _candidate_regions(page: fitz.Page, page_rect: fitz.Rect, dpi: float, coarse_dpi: float, max_bytes: int) -> List[fitz.IRect]:
+    """Kaba taramadan, tam çözünürlükte ayrı ayrı işlenebilecek bölgeler (cihaz pikseli, `dpi`)."""
+    coarse = render_alpha(page, coarse_dpi, page_irect(page_rect, coarse_dpi), max_bytes)
+    mask = cv2.threshold(coarse, 0, 255, cv2.THRESH_BINARY)[1]
+    del coarse
+    # Genişletme: iki kapatma erimi + kaba piksel payı → bölgeler arası boşluk kapatmayla kapanamaz
+    k = math.ceil((2 * CLOSE_REACH_PT) * coarse_dpi / 72) + 2
+    mask = cv2.dilate(mask, np.ones((2 * k + 1, 2 * k + 1), np.uint8))
+    n, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    del mask
+    if n <= 1:
+        return []
+
+    # Bileşen kutuları iç içe / üst üste binebilir; birleşimleri ayrık olana dek birleştir
+    scale = dpi / coarse_dpi
+    x, y, w, h = (stats[1:, i].astype(float) for i in range(4))
+    boxes = shapely.box(x * scale, y * scale, (x + w) * scale, (y + h) * scale)
+    while True:
+        merged = shapely.get_parts(shapely.union_all(shapely.envelope(boxes)))
+        if len(merged) == len(boxes):
+            break
+        boxes = merged
+    bounds = shapely.bounds(shapely.envelope(boxes))
+
+    full = page_irect(page_rect, dpi)
+    margin = (k - 1) * scale  # bölge kenarı ile mürekkep arası en az bu kadar
+    regions = []
+    for bx0, by0, bx1, by1 in bounds:
+        r = fitz.IRect(math.floor(bx0), math.floor(by0), math.ceil(bx1), math.ceil(by1)) & full
+        # Mürekkep kutusu bölgeden küçüktür (sayfa kenarında pay yok); filtreleri geçemeyecek bölge render edilmez
+        w_pt = (min(bx1 - margin, full.x1) - max(bx0 + margin, full.x0)) * 72 / dpi
+        h_pt = (min(by1 - margin, full.y1) - max(by0 + margin, full.y0)) * 72 / dpi
+        if w_pt > MIN_W and h_pt > MIN_H and w_pt * h_pt > MIN_AREA:
+            regions.append(r)
+    return regions
+
+
+def raster_page_boxes(
+    page: fitz.Page,
+    dpi: float = BOX_DPI,
+    memory_mb: float = BOX_MEMORY_MB,
+    coarse_dpi: Optional[float] = COARSE_DPI,
+) -> List[fitz.Rect]:
+    """Raster tespit, bellek sınırı içinde: küçük sayfalar tek geçiş, büyükler kaba-ince + şeritli."""
+    with _FITZ_LOCK:
+        page_rect = fitz.Rect(page.rect)
+    cap = int(memory_mb * 1024 * 1024)
+    band_bytes = cap // 4
+    full = page_irect(page_rect, dpi)
+    full_px = full.width * full.height
+
+    if not coarse_dpi or (full_px <= COARSE_MIN_PX and full_px * WORK_BYTES_PER_PX <= cap):
+        if full_px * WORK_BYTES_PER_PX <= cap:
+            with _FITZ_LOCK:
+                alpha = page_alpha(page, dpi)
+            return boxes_from_alpha(alpha, page_rect, dpi)
+        regions = [full]
+    else:
+        # Kaba tarama da sınıra sığmalı (alfa + maske + etiketler ≈ 7 bayt/piksel)
+        fit = dpi * math.sqrt(cap / (7 * full_px))
+        regions = _candidate_regions(page, page_rect, dpi, min(coarse_dpi, fit), band_bytes)
+
+    bboxes = []
+    for r in regions:
+        need = r.width * r.height * WORK_BYTES_PER_PX
+        if need <= cap:
+            alpha = render_alpha(page, dpi, r, band_bytes)
+            bboxes.extend(boxes_from_alpha(alpha, page_rect, dpi, origin=(r.x0, r.y0)))
+        else:
+            # Tek bölge sınırı aşıyor: sığan en yüksek DPI, kapatma erimi pt cinsinden korunur
+            f = math.sqrt(cap / need)
+            r_dpi = dpi * f
+            rr = fitz.IRect(math.floor(r.x0 * f), math.floor(r.y0 * f), math.ceil(r.x1 * f), math.ceil(r.y1 * f))
+            rr &= page_irect(page_rect, r_dpi)
+            alpha = render_alpha(page, r_dpi, rr, band_bytes)
+            bboxes.extend(boxes_from_alpha(
+                alpha, page_rect, r_dpi, origin=(rr.x0, rr.y0), close_iter=max(1, round(CLOSE_ITER * f)),
+            ))
+        del alpha
+    bboxes.sort(key=lambda r: (r.y0, r.x0))
+    return bboxes
+
+
+def check_method(method: str) -> None:
+    if method not in BOX_METHODS:
+        raise ValueError(f"Bilinmeyen kutu tespit yöntemi: {method!r} (geçerli: {', '.join(BOX_METHODS)})")
+
+
+def detect_page_boxes(
+    page: fitz.Page,
+    dpi: int = BOX_DPI,
+    method: str = BOX_METHOD,
+    memory_mb: float = BOX_MEMORY_MB,
+) -> List[fitz.Rect]:
+    check_method(method)
+    if method == "vector":
+        with _FITZ_LOCK:
+            items = _page_items(page)
+            page_rect = fitz.Rect(page.rect)
+        if items is not None:
+            return boxes_from_items(*items, page_rect)
+    return raster_page_boxes(page, dpi, memory_mb)
+
+
+class BoxCache:
+    """Bellek (LRU, `mem_bytes` sınırlı) + disk katmanlı bayt önbelleği; isabet/ıskalama sayaçlı.
+
+    Diskte bulunan kayıt belleğe de alınır. Aynı süreçteki tüm oturumlar paylaşır.
+    """
+
+    def __init__(self, mem_bytes: int = BOX_CACHE_MEM_BYTES, disk: Optional[DiskLRUCache] = None):
+        self.mem_bytes = int(mem_bytes)
+        self.disk = disk
+        self._mem: "OrderedDict[str, bytes]" = OrderedDict()
+        self._mem_size = 0
+        self._lock = threading.Lock()
+        self.mem_hits = self.disk_hits = self.misses = 0
+
+    def _remember(self, key: str, data: bytes) -> None:
+        # Kilit çağıran tarafta
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self._mem_size -= len(old)
+        if len(data) > self.mem_bytes:
+            return
+        self._mem[key] = data
+        self._mem_size += len(data)
+        while self._mem_size > self.mem_bytes:
+            _, dropped = self._mem.popitem(last=False)
+            self._mem_size -= len(dropped)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._mem.get(key)
+            if data is not None:
+                self._mem.move_to_end(key)
+                self.mem_hits += 1
+                return data
+        data = self.disk.get(key) if self.disk is not None else None
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, data)
+        return data
+
+    def set(self, key: str, data: bytes) -> None:
+        with self._lock:
+            self._remember(key, data)
+        if self.disk is not None:
+            self.disk.set(key, data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "bellek_isabet": self.mem_hits,
+                "disk_isabet": self.disk_hits,
+                "iskalama": self.misses,
+                "bellek_kayit": len(self._mem),
+                "bellek_bayt": self._mem_size,
+            }
+
+
+_default_box_cache: Optional[BoxCache] = None
+_default_thumb_cache: Optional[BoxCache] = None
+
+
+def default_box_cache() -> BoxCache:
+    global _default_box_cache
+    if _default_box_cache is None:
+        _default_box_cache = BoxCache(disk=DiskLRUCache(CACHE_ROOT / "boxes", BOX_CACHE_MAX_BYTES, suffix=".json"))
+    return _default_box_cache
+
+
+def default_thumb_cache() -> BoxCache:
+    global _default_thumb_cache
+    if _default_thumb_cache is None:
+        _default_thumb_cache = BoxCache(disk=DiskLRUCache(CACHE_ROOT / "thumbs", BOX_CACHE_MAX_BYTES, suffix=".png"))
+    return _default_thumb_cache
+
+
+def boxes_cache_key(pdf_hash: str, method: str = BOX_METHOD, dpi: float = BOX_DPI) -> str:
+    return f"b{BOX_CACHE_VERSION}|{pdf_hash}|{method}|{float(dpi)!r}"
+
+
+def thumbnail_cache_key(pdf_hash: str, pg_idx: int, box: fitz.Rect, zoom: float = 0.3) -> str:
+    return f"t{BOX_CACHE_VERSION}|{pdf_hash}|{int(pg_idx)}|{tuple(box)!r}|{float(zoom)!r}"
+
+
+def boxes_to_bytes(boxes: Dict[int, List[fitz.Rect]]) -> bytes:
+    return json.dumps({str(k): [tuple(r) for r in v] for k, v in boxes.items()}).encode("utf-8")
+
+
+def boxes_from_bytes(data: bytes) -> Dict[int, List[fitz.Rect]]:
+    return {int(k): [fitz.Rect(r) for r in v] for k, v in json.loads(data).items()}
+
+
+def box_thumbnail(doc: fitz.Document, pg_idx: int, box: fitz.Rect, zoom: float = 0.3) -> bytes:
+    # Arayüz küçük resimleri tarama sürerken de çizilir; MuPDF çağrısı aynı kilitle
+    with _FITZ_LOCK:
+        return doc[pg_idx].get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=box).tobytes("png")
+
+
+def iter_pdf_boxes(
+    pdf_bytes,
+    workers: Optional[int] = None,
+    ordered: bool = False,
+    dpi: int = BOX_DPI,
+    method: str = BOX_METHOD,
+    memory_mb: float = BOX_MEMORY_MB,
+    cache: Optional[BoxCache] = None,
+    pdf_hash: Optional[str] = None,
+) -> Iterator[Tuple[int, List[fitz.Rect]]]:
+    """Sayfa hazır oldukça (sayfa_indeksi, kutular) üretir.
+
+    ordered=True ise sayfa sırasıyla üretilir (ilk sayfa, diğerleri beklenmeden gelir).
+    method="vector" render etmeden çizim/görsel/metin kutularından bulur (gerekirse rastera düşer).
+    memory_mb raster yolunun toplam bellek sınırıdır; aynı anda çalışan işçiler arasında eşit bölünür.
+    Üretici erken kapatılırsa başlamamış sayfalar iptal edilir.
+    cache verilirse önbellekteki sonuç sayfa sırasıyla döner; yeni sonuç yalnızca
+    tüm sayfalar bitince yazılır. pdf_hash verilmezse içerikten hesaplanır.
+    """
+    check_method(method)
+    key = None
+    if cache is not None:
+        key = boxes_cache_key(pdf_hash or sha256_bytes(pdf_bytes), method, dpi)
+        data = cache.get(key)
+        if data is not None:
+            yield from sorted(boxes_from_bytes(data).items())
+            return
+    with _FITZ_LOCK:
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+            n = len(doc)
+    if n == 0:
+        return
+    workers = max(1, min(int(workers or BOX_WORKERS), n))
+    # Tek sınır: her işçi kendi sayfasını toplamın payı içinde render eder
+    worker_mb = float(memory_mb) / workers
+
+    local = threading.local()
+    opened: List[fitz.Document] = []
+
+    def run(pg_idx):
+        doc = getattr(local, "doc", None)
+        if doc is None:
+            with _FITZ_LOCK:
+                doc = local.doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+                opened.append(doc)
+        with _FITZ_LOCK:
+            page = doc[pg_idx]
+        try:
+            # MuPDF çağrıları içeride kilitli; OpenCV / shapely kısmı kilitsiz
+            return pg_idx, detect_page_boxes(page, dpi, method, worker_mb)
+        finally:
+            with _FITZ_LOCK:
+                del page
+
+    found = {}
+    ex = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdf-boxes")
+    try:
+        futures = [ex.submit(run, pg_idx) for pg_idx in range(n)]
+        for fut in futures if ordered else as_completed(futures):
+            pg_idx, boxes = fut.result()
+            found[pg_idx] = boxes
+            yield pg_idx, boxes
+        if key is not None:
+            cache.set(key, boxes_to_bytes(dict(sorted(found.items()))))
+    finally:
+        ex.shutdown(wait=True, cancel_futures=True)
+        with _FITZ_LOCK:
+            for doc in opened:
+                doc.close()
+
+
+def find_pdf_boxes(
+    pdf_bytes,
+    workers: Optional[int] = None,
+    on_page: Optional[Callable[[int, List[fitz.Rect], int], None]] = None,
+    method: str = BOX_METHOD,
+    memory_mb: float = BOX_MEMORY_MB,
+    cache: Optional[BoxCache] = None,
+    pdf_hash: Optional[str] = None,
+) -> Dict[int, List[fitz.Rect]]:
+    """{sayfa_indeksi: [Rect, ...]} — kutular (y0, x0) sırasında.
+
+    on_page(sayfa_indeksi, kutular, biten_sayfa) her sayfa bittiğinde çağrılır;
+    ilk çağrı "ilk sayfa hazır" sinyalidir.
+    """
+    found = {}
+    for pg_idx, boxes in iter_pdf_boxes(
+        pdf_bytes, workers=workers, method=method, memory_mb=memory_mb, cache=cache, pdf_hash=pdf_hash,
+    ):
+        found[pg_idx] = boxes
+        if on_page is not None:
+            on_page(pg_idx, boxes, len(found))
+    return dict(sorted(found.items()))
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import io
+import os
+import tempfile
+import zipfile
+from typing import Optional
+
+# ------------------------------------------------
+#  DİSKE TAŞAN ZIP
+# ------------------------------------------------
+# Çıktılar biter bitmez arşive yazılır; arşiv küçükken bellekte (BytesIO),
+# ZIP_SPOOL_MAX_MB aşılınca tamponsuz geçici dosyada tutulur. PDF çıktıları zaten deflate'li olduğundan
+# varsayılan ZIP_STORED'dır (yeniden sıkıştırma CPU harcar, boyut kazandırmaz).
+
+ZIP_SPOOL_MAX_BYTES = int(float(os.environ.get("ZIP_SPOOL_MAX_MB", 64)) * 1024 * 1024)
+
+
+def unique_arcname(arcname: str, taken: set) -> str:
+    """`taken` içinde olmayan ZIP içi ad ("ad.pdf" doluysa "ad_2.pdf", "ad_3.pdf", ...); ad `taken`'a eklenir."""
+    stem, ext = os.path.splitext(arcname)
+    name, n = arcname, 1
+    while name in taken:
+        n += 1
+        name = f"{stem}_{n}{ext}"
+    taken.add(name)
+    return name
+
+
+class _SpoolFile(io.RawIOBase):
+    # ZipFile'ın yazdığı sabit nesne; altındaki `file` sınır aşılınca BytesIO'dan
+    # TemporaryFile(buffering=0)'a geçer. İçerik bir kez kopyalanır.
+
+    def __init__(self, max_size: int):
+        self.file = io.BytesIO()
+        self.max_size = int(max_size)
+        self.rolled = False
+
+    def _rollover(self) -> None:
+        disk = tempfile.TemporaryFile(buffering=0)
+        pos = self.file.tell()
+        disk.write(self.file.getbuffer())
+        disk.seek(pos)
+        self.file = disk
+        self.rolled = True
+
+    def readable(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        if not self.rolled and self.file.tell() + memoryview(b).nbytes > self.max_size:
+            self._rollover()
+        return self.file.write(b)
+
+    def readinto(self, b) -> int:
+        return self.file.readinto(b)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self.file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self.file.tell()
+
+    def flush(self) -> None:
+        self.file.flush()
+
+    def close(self) -> None:
+        super().close()
+        self.file.close()
+
+
+class SpooledZip:
+    """`with SpooledZip() as sz: sz.add(ad, veri)` → `sz.download_data()` ile indirilir.
+
+    compresslevel=None ise dosyalar sıkıştırılmadan (ZIP_STORED) eklenir, 0-9 verilirse
+    ZIP_DEFLATED o seviyede kullanılır.
+    """
+
+    def __init__(self, compresslevel: Optional[int] = None, max_size: int = ZIP_SPOOL_MAX_BYTES):
+        self.spool = _SpoolFile(max_size)
+        compression = zipfile.ZIP_STORED if compresslevel is None else zipfile.ZIP_DEFLATED
+        self.zf = zipfile.ZipFile(self.spool, "w", compression=compression, compresslevel=compresslevel)
+        self.count = 0
+
+    def add(self, arcname: str, data) -> None:
+        self.zf.writestr(arcname, data)
+        self.count += 1
+
+    def finish(self) -> None:
+        if self.zf is not None:
+            self.zf.close()
+            self.zf = None
+
+    @property
+    def size(self) -> int:
+        pos = self.spool.tell()
+        end = self.spool.seek(0, io.SEEK_END)
+        self.spool.seek(pos)
+        return end
+
+    def download_data(self):
+        """st.download_button'a verilecek dosya nesnesi (arşiv kopyalanmaz).
+
+        Bellekteyse BytesIO, diske taştıysa tamponsuz geçici dosya (FileIO) döner;
+        Streamlit veriyi bir kez okur.
+        """
+        self.finish()
+        f = self.spool.file
+        f.seek(0)
+        return f
+
+    def close(self) -> None:
+        try:
+            self.finish()
+        finally:
+            self.spool.close()
+
+    def __enter__(self) -> "SpooledZip":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if exc[0] is not None:
+            self.close()
+        else:
+            self.finish()
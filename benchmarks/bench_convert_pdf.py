@@ -0,0 +1,407 @@
+"""convert_pdf tarama hattı için benchmark + altın geometri kontrolü.
+
+Kullanım (repo kökünden):
+    python benchmarks/bench_convert_pdf.py --out bench_results.json
+    python benchmarks/bench_convert_pdf.py --write-golden      # altın dosyayı yenile
+    python benchmarks/bench_convert_pdf.py --quick             # küçük boyutlar, tek tekrar
+
+Sentetik bıçak izi PDF'leri PyMuPDF ile üretilir; her durum için aşama süreleri
+(ProcessStats) farklı tarama_araligi / bezier_adim ayarlarında ölçülür ve JSON
+olarak yazılır. Altın kontrol, varsayılan ayarlarla çıkan tarama parçalarının
+parmak izini benchmarks/golden.json ile karşılaştırır. Ayrıca her durum, ilk
+sürümdeki algoritmanın birebir kopyası olan referans kâhine karşı denetlenir:
+  - aynı geometride satır satır poly.intersection(LineString) döngüsü (tarama kesici)
+  - ilk sürümün tüm hattı (seçim, polygonize, tek seviye delik, aynı döngü)
+Böylece hızlandırmaların çıktıyı ilk davranışa göre değiştirmediği gösterilir;
+bilinçli davranış değişiklikleri INTENDED_CHANGES'ta listelenir.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import platform
+import statistics
+import sys
+from pathlib import Path
+
+import fitz  # PyMuPDF
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "app"))
+
+from shapely.geometry import LineString, box  # noqa: E402
+from shapely.ops import polygonize, unary_union  # noqa: E402
+
+from pages.convert_pdf import compute_hatch, load_geometry, process_pdf_bytes  # noqa: E402
+
+GOLDEN_PATH = Path(__file__).resolve().parent / "golden.json"
+KNIFE = dict(color=(1, 0, 0), width=2.83)
+ANGLES = (45.0, 135.0)
+SPACING = 6
+# İlk sürümden bilinçli olarak ayrılan durumlar (tam hat kâhini yalnızca raporlar)
+INTENDED_CHANGES = {
+    "nested_holes": "user-006: delik içindeki adalar artık taranıyor (ilk sürümde tek seviye delik)",
+}
+
+
+# ------------------------------------------------
+#  SENTETİK BIÇAK İZLERİ
+# ------------------------------------------------
+def _rounded_rect(shape, x0, y0, x1, y1, r):
+    P = fitz.Point
+    k = 0.5523 * r
+    shape.draw_line(P(x0 + r, y0), P(x1 - r, y0))
+    shape.draw_bezier(P(x1 - r, y0), P(x1 - r + k, y0), P(x1, y0 + r - k), P(x1, y0 + r))
+    shape.draw_line(P(x1, y0 + r), P(x1, y1 - r))
+    shape.draw_bezier(P(x1, y1 - r), P(x1, y1 - r + k), P(x1 - r + k, y1), P(x1 - r, y1))
+    shape.draw_line(P(x1 - r, y1), P(x0 + r, y1))
+    shape.draw_bezier(P(x0 + r, y1), P(x0 + r - k, y1), P(x0, y1 - r + k), P(x0, y1 - r))
+    shape.draw_line(P(x0, y1 - r), P(x0, y0 + r))
+    shape.draw_bezier(P(x0, y0 + r), P(x0, y0 + r - k), P(x0 + r - k, y0), P(x0 + r, y0))
+
+
+def _rect(shape, x0, y0, x1, y1):
+    # draw_rect (ve kapalı 4 çizgi) get_drawings'te "re"/"qu" öğesine dönüşür; bıçak izi
+    # çıkarımı sadece "l"/"c" okuduğu için üst kenara ara nokta koyup çizgi olarak bırak
+    P = fitz.Point
+    shape.draw_polyline([P(x0, y0), P((x0 + x1) / 2, y0), P(x1, y0), P(x1, y1), P(x0, y1), P(x0, y0)])
+
+
+def _page(size):
+    doc = fitz.open()
+    page = doc.new_page(width=size[0], height=size[1])
+    return doc, page
+
+
+def _finish(doc, page, shape):
+    shape.finish(**KNIFE)
+    shape.commit()
+    # Bıçak izi dışında dolgulu bir baskı alanı (gerçek dosyalardaki artwork gibi)
+    art = page.new_shape()
+    art.draw_rect(fitz.Rect(20, page.rect.height * 0.6, page.rect.width - 20, page.rect.height - 20))
+    art.finish(color=(0, 0, 1), fill=(0.2, 0.8, 0.2), width=0.2)
+    art.commit()
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def make_rectangle(scale: int) -> bytes:
+    w, h = 400 * scale, 300 * scale
+    doc, page = _page((w + 100, 2 * h + 200))
+    s = page.new_shape()
+    _rect(s, 50, 50, 50 + w, 50 + h)
+    return _finish(doc, page, s)
+
+
+def make_doypack(scale: int) -> bytes:
+    # Yuvarlak köşeli torba + askı deliği + yırtma çentikleri
+    w, h = 300 * scale, 450 * scale
+    doc, page = _page((w + 100, 2 * h + 200))
+    s = page.new_shape()
+    _rounded_rect(s, 50, 50, 50 + w, 50 + h, 25 * scale)
+    s.draw_oval(fitz.Rect(50 + w / 2 - 20 * scale, 80, 50 + w / 2 + 20 * scale, 80 + 12 * scale))
+    for x in (50 + 10, 50 + w - 10):
+        s.draw_polyline([fitz.Point(x - 4, 120), fitz.Point(x, 112), fitz.Point(x + 4, 120), fitz.Point(x - 4, 120)])
+    return _finish(doc, page, s)
+
+
+def make_many_curves(scale: int) -> bytes:
+    # Kenarları dalgalı (her dalga bir kübik eğri) kapalı şekil
+    n = 200 * scale
+    cx, cy, r = 600.0, 600.0, 500.0
+    doc, page = _page((1200, 2600))
+    s = page.new_shape()
+    P = fitz.Point
+    pts = []
+    for i in range(n + 1):
+        a = 2 * math.pi * i / n
+        rr = r + (15 if i % 2 else -15)
+        pts.append(P(cx + rr * math.cos(a), cy + rr * math.sin(a)))
+    for a, b in zip(pts[:-1], pts[1:]):
+        m = (a + b) / 2
+        s.draw_bezier(a, m + (m - P(cx, cy)) * 0.02, m - (m - P(cx, cy)) * 0.02, b)
+    return _finish(doc, page, s)
+
+
+def make_nested_holes(scale: int) -> bytes:
+    # Pencereler ve pencere içinde adalar (iç içe derinlik 2)
+    k = 4 * scale
+    cell = 60
+    size = k * cell + 100
+    doc, page = _page((size, 2 * size + 100))
+    s = page.new_shape()
+    _rect(s, 50, 50, 50 + k * cell, 50 + k * cell)
+    for i in range(k):
+        for j in range(k):
+            x, y = 50 + i * cell, 50 + j * cell
+            _rect(s, x + 10, y + 10, x + cell - 10, y + cell - 10)
+            if (i + j) % 2 == 0:
+                s.draw_circle(fitz.Point(x + cell / 2, y + cell / 2), 8)
+    return _finish(doc, page, s)
+
+
+def make_duplicate_strokes(scale: int) -> bytes:
+    # Aynı konturun binlerce kez (ve parça parça) tekrar çizildiği dışa aktarımlar
+    doc, page = _page((900, 1900))
+    copies = 50 * scale
+    for c in range(copies):
+        s = page.new_shape()
+        _rounded_rect(s, 50, 50, 850, 850, 40)
+        # Bir kenarı küçük parçalara bölünmüş tekrar
+        for t in range(10):
+            s.draw_line(fitz.Point(90 + t * 77, 50), fitz.Point(90 + (t + 1) * 77, 50))
+        if c < copies - 1:
+            s.finish(**KNIFE)
+            s.commit()
+    return _finish(doc, page, s)
+
+
+CASES = {
+    "rectangle": make_rectangle,
+    "doypack": make_doypack,
+    "many_curves": make_many_curves,
+    "nested_holes": make_nested_holes,
+    "duplicate_strokes": make_duplicate_strokes,
+}
+
+
+# ------------------------------------------------
+#  ÖLÇÜM
+# ------------------------------------------------
+def _span_stats(spans: np.ndarray) -> dict:
+    canon = np.round(spans.reshape(-1, 4), 2)
+    canon = canon[np.lexsort(canon.T[::-1])]
+    length = float(np.hypot(spans[:, 1, 0] - spans[:, 0, 0], spans[:, 1, 1] - spans[:, 0, 1]).sum())
+    return {
+        "spans": int(len(spans)),
+        "length": round(length, 1),
+        "sha256": hashlib.sha256(canon.tobytes()).hexdigest(),
+    }
+
+
+# ------------------------------------------------
+#  REFERANS KÂHİN (ilk sürümün algoritması, birebir)
+# ------------------------------------------------
+def _bezier_points(p0, p1, p2, p3, n: int = 20):
+    pts = []
+    for i in range(n + 1):
+        t = i / n
+        mt = 1 - t
+        x = (mt**3) * p0.x + 3 * (mt**2) * t * p1.x + 3 * mt * (t**2) * p2.x + (t**3) * p3.x
+        y = (mt**3) * p0.y + 3 * (mt**2) * t * p1.y + 3 * mt * (t**2) * p2.y + (t**3) * p3.y
+        pts.append((x, y))
+    return pts
+
+
+def reference_geometry(pdf_bytes: bytes, hedef_kalinlik: float = 2.83, bezier_adim: int = 20, buffer_eps: float = 0.01):
+    """İlk process_pdf'in geometri kısmı: (poly_to_hatch, sayfa genişliği, sayfa yüksekliği)."""
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        src_page = doc[0]
+        page_height = src_page.rect.height
+        paths = src_page.get_drawings()
+        bicak_izleri = [p for p in paths if p.get("width") is not None and abs(p["width"] - hedef_kalinlik) <= 0.1 and p["rect"].y1 < (page_height / 2)]
+        if not bicak_izleri:
+            bicak_izleri = [p for p in paths if p.get("width") is not None and abs(p["width"] - hedef_kalinlik) <= 0.1]
+        if not bicak_izleri:
+            bicak_izleri = [p for p in paths if p.get("width") is not None and 1 <= p["width"] <= 5]
+        if not bicak_izleri:
+            bicak_izleri = [p for p in paths if p["rect"].width > 50 or p["rect"].height > 50]
+        final_rect = fitz.Rect(bicak_izleri[0]["rect"])
+        for p in bicak_izleri[1:]:
+            final_rect |= p["rect"]
+        offset = final_rect.tl - fitz.Point(1, 1)
+
+        all_lines = []
+        for p in bicak_izleri:
+            for item in p["items"]:
+                if item[0] == "l":
+                    a, b = item[1] - offset, item[2] - offset
+                    all_lines.append(LineString([(a.x, a.y), (b.x, b.y)]))
+                elif item[0] == "c":
+                    p0, p1, p2, p3 = [v - offset for v in item[1:5]]
+                    all_lines.append(LineString(_bezier_points(p0, p1, p2, p3, n=int(bezier_adim))))
+    finally:
+        doc.close()
+
+    merged = unary_union(all_lines)
+    polys = list(polygonize(merged))
+    if not polys:
+        refined = merged.buffer(1.2).buffer(-1.1)
+        if refined.geom_type == "Polygon":
+            polys = [refined]
+        elif hasattr(refined, "geoms"):
+            polys = [g for g in refined.geoms if g.geom_type == "Polygon"]
+    if not polys:
+        poly_to_hatch = box(*merged.bounds)
+    else:
+        outer_poly = max(polys, key=lambda p: p.area)
+        inner_holes = [p for p in polys if p != outer_poly and p.within(outer_poly)]
+        poly_to_hatch = outer_poly.difference(unary_union(inner_holes)) if inner_holes else outer_poly
+    return poly_to_hatch.buffer(float(buffer_eps)), final_rect.width + 2, final_rect.height + 2
+
+
+def reference_spans(poly, width: float, height: float, tarama_araligi: int, angle_deg: float) -> np.ndarray:
+    """İlk process_pdf'in tarama döngüsü: her çizgi için poly.intersection(LineString)."""
+    diag = math.sqrt(width**2 + height**2)
+    angle_rad = math.radians(angle_deg)
+    dx, dy = math.cos(angle_rad), math.sin(angle_rad)
+    nx, ny = -dy, dx
+    spans = []
+
+    def take(g):
+        if g.geom_type == "LineString":
+            pts = list(g.coords)
+            spans.append((pts[0], pts[-1]))
+        elif hasattr(g, "geoms"):
+            for sub_g in g.geoms:
+                take(sub_g)
+
+    for i in range(-int(diag), int(diag), int(tarama_araligi)):
+        cx, cy = nx * i + width / 2, ny * i + height / 2
+        line = LineString([(cx - dx * diag, cy - dy * diag), (cx + dx * diag, cy + dy * diag)])
+        inter = poly.intersection(line)
+        if not inter.is_empty:
+            take(inter)
+    return np.array(spans, dtype=float).reshape(-1, 2, 2)
+
+
+def hatch_fingerprint(pdf_bytes: bytes) -> dict:
+    """Güncel hattın parmak izi + iki kâhin: aynı geometride satır döngüsü ve ilk sürümün tüm hattı."""
+    geometry = load_geometry(pdf_bytes)
+    width, height = geometry.page_size
+    ref_poly, ref_w, ref_h = reference_geometry(pdf_bytes)
+    fp = {"area": round(float(geometry.poly_to_hatch.area), 1), "oracle": {}, "original": {"area": round(float(ref_poly.area), 1)}}
+    for angle in ANGLES:
+        key = f"{angle:g}"
+        fp[key] = _span_stats(compute_hatch(geometry, SPACING, angle))
+        fp["oracle"][key] = _span_stats(reference_spans(geometry.poly_to_hatch, width, height, SPACING, angle))
+        fp["original"][key] = _span_stats(reference_spans(ref_poly, ref_w, ref_h, SPACING, angle))
+    return fp
+
+
+def compare_fingerprint(expected: dict, actual: dict, rel_tol: float = 1e-4) -> list:
+    # Sayılar birebir, uzunluk/alan göreli toleransla; hash farkı tek başına uyarıdır
+    problems = []
+    if not math.isclose(expected["area"], actual["area"], rel_tol=rel_tol, abs_tol=0.5):
+        problems.append(f"area {expected['area']} != {actual['area']}")
+    for angle in ANGLES:
+        key = f"{angle:g}"
+        e, a = expected[key], actual[key]
+        if e["spans"] != a["spans"]:
+            problems.append(f"{key}°: spans {e['spans']} != {a['spans']}")
+        if not math.isclose(e["length"], a["length"], rel_tol=rel_tol, abs_tol=0.5):
+            problems.append(f"{key}°: length {e['length']} != {a['length']}")
+    return problems
+
+
+def check_oracles(name: str, fp: dict) -> list:
+    """Güncel çıktı kâhinlerle uyuşmuyorsa sorun listesi; bilinçli değişiklikte tam hat farkı sorun sayılmaz."""
+    problems = [f"kâhin {p}" for p in compare_fingerprint({"area": fp["area"], **fp["oracle"]}, fp)]
+    original = compare_fingerprint(fp["original"], fp)
+    if original and name not in INTENDED_CHANGES:
+        problems += [f"ilk sürüm {p}" for p in original]
+    return problems
+
+
+def bench_case(pdf_bytes: bytes, tarama_araligi: int, bezier_adim: int, repeat: int, hatch_workers=None) -> dict:
+    runs = []
+    for _ in range(repeat):
+        _, stats = process_pdf_bytes(pdf_bytes, tarama_araligi=tarama_araligi, bezier_adim=bezier_adim,
+                                     return_stats=True, hatch_workers=hatch_workers)
+        runs.append(stats)
+    stages = sorted({k for st in runs for k in st.sure})
+    last = runs[-1]
+    return {
+        "tarama_araligi": tarama_araligi,
+        "bezier_adim": bezier_adim,
+        "hatch_workers": hatch_workers,
+        "repeat": repeat,
+        "total_s": statistics.median(st.toplam for st in runs),
+        "stages_s": {k: statistics.median(st.sure.get(k, 0.0) for st in runs) for k in stages},
+        "counts": {
+            "drawings": last.drawings,
+            "selected_paths": last.selected_paths,
+            "segments": last.segments,
+            "faces": last.faces,
+            "hatch_lines": last.hatch_lines,
+            "fallback_tier": last.fallback_tier,
+        },
+        "prenode": last.prenode,
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--out", type=Path, default=Path("bench_results.json"))
+    ap.add_argument("--scales", type=int, nargs="+", default=[1, 2, 4])
+    ap.add_argument("--spacings", type=int, nargs="+", default=[3, 6, 12])
+    ap.add_argument("--bezier", type=int, nargs="+", default=[10, 20, 40])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--hatch-workers", type=int, default=None, help="Şeritli paralel tarama (process_pdf hatch_workers)")
+    ap.add_argument("--cases", nargs="+", default=list(CASES), choices=list(CASES))
+    ap.add_argument("--quick", action="store_true", help="scale=1, tek ayar, tek tekrar")
+    ap.add_argument("--write-golden", action="store_true")
+    ap.add_argument("--no-golden", action="store_true")
+    args = ap.parse_args(argv)
+
+    if args.quick:
+        args.scales, args.spacings, args.bezier, args.repeat = [1], [6], [20], 1
+
+    results = {
+        "python": platform.python_version(),
+        "pymupdf": fitz.VersionBind,
+        "numpy": np.__version__,
+        "runs": [],
+        "golden": {},
+        "oracle": {},
+    }
+
+    for name in args.cases:
+        for scale in args.scales:
+            data = CASES[name](scale)
+            for spacing in args.spacings:
+                for bez in args.bezier:
+                    row = bench_case(data, spacing, bez, args.repeat, args.hatch_workers)
+                    row.update(case=name, scale=scale, pdf_bytes=len(data))
+                    results["runs"].append(row)
+                    print(f"{name:18s} x{scale:<2d} aralik={spacing:<3d} bezier={bez:<3d} "
+                          f"{row['total_s'] * 1000:8.1f} ms  hatch_lines={row['counts']['hatch_lines']}")
+
+    # Altın geometri: her durumun scale=1 hali, varsayılan ayarlar
+    status = 0
+    if not args.no_golden:
+        actual = {name: hatch_fingerprint(CASES[name](1)) for name in CASES}
+        for name, fp in actual.items():
+            problems = check_oracles(name, fp)
+            results["oracle"][name] = {"ok": not problems, "problems": problems}
+            note = f" ({INTENDED_CHANGES[name]})" if name in INTENDED_CHANGES else ""
+            print(f"kâhin  {name:18s} {'OK' if not problems else 'FARKLI'}{note} {'; '.join(problems)}")
+            if problems:
+                status = 1
+        if args.write_golden:
+            GOLDEN_PATH.write_text(json.dumps(actual, indent=2, sort_keys=True) + "\n")
+            print(f"Altın dosya yazıldı: {GOLDEN_PATH}")
+        elif GOLDEN_PATH.exists():
+            expected = json.loads(GOLDEN_PATH.read_text())
+            for name, fp in actual.items():
+                problems = compare_fingerprint(expected[name], fp) if name in expected else ["altın kayıt yok"]
+                same_hash = name in expected and all(
+                    expected[name][f"{a:g}"]["sha256"] == fp[f"{a:g}"]["sha256"] for a in ANGLES)
+                results["golden"][name] = {"ok": not problems, "identical": same_hash, "problems": problems}
+                print(f"golden {name:18s} {'OK' if not problems else 'FARKLI'}"
+                      f"{'' if same_hash or problems else ' (tolerans içinde)'} {'; '.join(problems)}")
+                if problems:
+                    status = 1
+
+    args.out.write_text(json.dumps(results, indent=2))
+    print(f"Sonuçlar: {args.out}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
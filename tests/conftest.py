@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Önbellek ve batch iş dizinleri gerçek önbelleğe değil geçici köke yazılır
+# (modüller CACHE_ROOT'u import sırasında okur; alt süreçler ortamı devralır)
+os.environ.setdefault("GRAFIK_CACHE_DIR", tempfile.mkdtemp(prefix="grafik_test_cache_"))
+
+# Uygulama modülleri app/ kökünden düz import edilir (streamlit'teki gibi)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
@@ -0,0 +1,22 @@
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
+from shapely.ops import unary_union
+
+
+def random_multipolygon(rng):
+    # Birkaç ayrık dış halka; her birinde rastgele delikler (biri içinde ada)
+    parts = []
+    for k in range(rng.integers(1, 4)):
+        x0 = 250.0 * k + rng.uniform(0, 20)
+        y0 = rng.uniform(0, 40)
+        n = int(rng.integers(5, 12))
+        ang = np.sort(rng.uniform(0, 2 * np.pi, n))
+        rad = rng.uniform(70, 110, n)
+        cx, cy = x0 + 110, y0 + 110
+        shell = Polygon(np.c_[cx + rad * np.cos(ang), cy + rad * np.sin(ang)]).buffer(0)
+        holes = [shapely.Point(cx + rng.uniform(-30, 30), cy + rng.uniform(-30, 30)).buffer(rng.uniform(8, 25), 6)
+                 for _ in range(rng.integers(0, 3))]
+        poly = shell.difference(unary_union(holes)) if holes else shell
+        parts.append(poly)
+    return unary_union(parts)
@@ -0,0 +1,97 @@
+import time
+import zipfile
+
+import fitz
+import pytest
+
+import batch_jobs
+from batch_jobs import BatchJob, output_rel
+
+
+def die_line_pdf(w: float, h: float) -> bytes:
+    # Hedef kalınlıkta (2.83) tek bir kapalı bıçak izi
+    doc = fitz.open()
+    page = doc.new_page(width=w + 100, height=2 * h + 100)
+    page.draw_rect(fitz.Rect(50, 50, 50 + w, 50 + h), color=(0, 0, 0), width=2.83)
+    return doc.tobytes()
+
+
+def blank_pdf() -> bytes:
+    # Bıçak izi yok: her ayar hataya düşer
+    doc = fitz.open()
+    doc.new_page()
+    return doc.tobytes()
+
+
+A = die_line_pdf(200, 120)
+B = die_line_pdf(150, 150)
+PARAMS = {"tarama_araligi": 6}
+CONFIGS = [{"TARAMA_ACISI_DERECE": 45, "yon": 2}, {"TARAMA_ACISI_DERECE": 135, "yon": 1}]
+
+
+@pytest.fixture(autouse=True)
+def jobs_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_jobs, "JOBS_ROOT", tmp_path / "jobs")
+    return tmp_path / "jobs"
+
+
+def run(job: BatchJob) -> BatchJob:
+    job.start(max_workers=2, timeout=120)
+    while job.is_running():
+        time.sleep(0.05)
+    return job.reload()
+
+
+def test_shared_yon_keeps_both_outputs():
+    configs = [{"TARAMA_ACISI_DERECE": 45, "yon": 1}, {"TARAMA_ACISI_DERECE": 135, "yon": 1}]
+    job = run(BatchJob.create([("a.pdf", A)], configs, PARAMS))
+    assert job.progress() == (2, 0, 2)
+    paths = [p for _, p in job.outputs()]
+    assert len(set(paths)) == 2
+    assert paths[0].read_bytes() != paths[1].read_bytes()
+    with zipfile.ZipFile(job.archive()) as zf:
+        assert zf.namelist() == ["a-45_1.pdf", "a-135_1.pdf"]
+
+
+def test_duplicate_uploads_and_names():
+    files = [("a.pdf", A), ("b.pdf", B), ("kopya/a.pdf", A), ("x/a.pdf", B)]
+    job = BatchJob.create(files, CONFIGS, PARAMS)
+    # Aynı içerik bir kez işlenir
+    assert [h for h, _, _ in job.pending()] == [job.manifest["files"][0]["hash"], job.manifest["files"][1]["hash"]]
+    run(job)
+    assert job.progress() == (8, 0, 8)
+    names = [a for a, _ in job.outputs()]
+    assert names == ["a-2.pdf", "a-1.pdf", "b-2.pdf", "b-1.pdf", "a-2_2.pdf", "a-1_2.pdf"]
+    with zipfile.ZipFile(job.archive()) as zf:
+        assert zf.namelist() == names
+        assert zf.getinfo("a-2.pdf").compress_type == zipfile.ZIP_STORED
+        assert zf.read("a-2_2.pdf") == zf.read("b-2.pdf")
+
+
+def test_resume_skips_done_pairs():
+    job = BatchJob.create([("a.pdf", A), ("b.pdf", B)], CONFIGS, PARAMS)
+    ha = job.manifest["files"][0]["hash"]
+    # Yarım kalmış iş: bir çift önceden bitmiş
+    rel = output_rel(ha, CONFIGS[0])
+    (job.dir / rel).write_bytes(b"onceden")
+    job.manifest["done"][job._pair(ha, CONFIGS[0])] = rel
+    batch_jobs._write_json(job.dir / "manifest.json", job.manifest)
+
+    reopened = BatchJob.open(job.job_id)
+    assert [(h, [c["yon"] for c in missing]) for h, _, missing in reopened.pending()][0] == (ha, [1])
+    run(reopened)
+    assert reopened.progress() == (4, 0, 4)
+    assert (job.dir / rel).read_bytes() == b"onceden"
+    # Aynı dosya + ayarlar aynı işe düşer
+    assert BatchJob.create([("a.pdf", A), ("b.pdf", B)], CONFIGS, PARAMS).job_id == job.job_id
+
+
+def test_retry_failed_requeues_and_drops_archive():
+    job = run(BatchJob.create([("bos.pdf", blank_pdf())], CONFIGS, PARAMS))
+    assert job.progress() == (0, 2, 2)
+    assert len(job.failures()) == 2
+    assert job.pending() == []
+    assert job.archive().exists()
+    job.retry_failed()
+    assert not job.archive_path.exists()
+    assert len(job.pending()) == 1
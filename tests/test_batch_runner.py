@@ -0,0 +1,70 @@
+import os
+import sys
+import time
+
+import pytest
+
+from batch_runner import run_jobs
+
+# Hedefler alt süreçte bu modülden import edilir (forkserver/spawn)
+
+
+def square(x):
+    return x * x
+
+
+def sleeper(s):
+    time.sleep(s)
+    return s
+
+
+def hog(mb, s):
+    buf = bytearray(mb * 1024 * 1024)
+    for i in range(0, len(buf), 4096):
+        buf[i] = 1
+    time.sleep(s)
+    return len(buf)
+
+
+def crash(code):
+    os._exit(code)
+
+
+def fail(msg):
+    raise ValueError(msg)
+
+
+def results(*args, **kwargs):
+    return {r.key: r for r in run_jobs(*args, **kwargs)}
+
+
+def test_results_and_errors():
+    res = results([(i, (i,)) for i in range(5)], square, max_workers=3)
+    assert {k: r.value for k, r in res.items()} == {i: i * i for i in range(5)}
+    res = results([("x", ("bozuk",))], fail)
+    assert not res["x"].ok
+    assert res["x"].error == "ValueError: bozuk"
+
+
+def test_timeout_kills_only_slow_job():
+    t0 = time.monotonic()
+    res = results([("yavas", (30,)), ("hizli", (0,))], sleeper, max_workers=2, timeout=1)
+    assert time.monotonic() - t0 < 10
+    assert res["hizli"].ok
+    assert not res["yavas"].ok
+    assert res["yavas"].error.startswith("Zaman aşımı")
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="RSS /proc üzerinden okunur")
+def test_rss_cap_kills_child():
+    t0 = time.monotonic()
+    res = results([("buyuk", (400, 30)), ("kucuk", (1, 0))], hog, max_workers=2, memory_mb=200, timeout=60)
+    assert time.monotonic() - t0 < 20
+    assert res["buyuk"].error == "Bellek sınırı aşıldı (200 MB)"
+    assert res["kucuk"].value == 1024 * 1024
+
+
+def test_child_crash_is_reported():
+    res = results([("coken", (3,))], crash)
+    assert not res["coken"].ok
+    assert "exitcode=3" in res["coken"].error
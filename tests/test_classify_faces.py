@@ -0,0 +1,33 @@
+import pytest
+import shapely
+from shapely.geometry import box
+from shapely.ops import polygonize, unary_union
+
+from pages.convert_pdf import classify_faces
+
+
+def faces_of(*rects):
+    return list(polygonize(unary_union([box(*r).exterior for r in rects])))
+
+
+def test_classify_faces_single_hole():
+    out = classify_faces(faces_of((0, 0, 100, 100), (20, 20, 40, 40)))
+    assert out.area == pytest.approx(100 * 100 - 20 * 20)
+    assert not out.contains(shapely.Point(30, 30))
+
+
+def test_classify_faces_hole_island_hole():
+    # dış (taranır) → delik → ada (taranır) → adadaki delik
+    out = classify_faces(faces_of((0, 0, 100, 100), (10, 10, 90, 90), (30, 30, 70, 70), (45, 45, 55, 55)))
+    assert out.contains(shapely.Point(5, 5))
+    assert not out.contains(shapely.Point(20, 20))
+    assert out.contains(shapely.Point(35, 35))
+    assert not out.contains(shapely.Point(50, 50))
+    assert out.area == pytest.approx(100**2 - 80**2 + 40**2 - 10**2)
+
+
+def test_classify_faces_sibling_holes_and_outside_faces():
+    # Kardeş delikler; dış çerçevenin dışında kalan yüz yok sayılır
+    out = classify_faces(faces_of((0, 0, 100, 100), (10, 10, 30, 30), (60, 60, 80, 80), (200, 0, 210, 10)))
+    assert out.area == pytest.approx(100**2 - 2 * 20**2)
+    assert not out.intersects(box(200, 0, 210, 10))
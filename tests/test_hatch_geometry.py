@@ -0,0 +1,50 @@
+import math
+
+import numpy as np
+import pytest
+import shapely
+from shapely.geometry import LineString
+
+from hatch_scanline import hatch_spans
+from shapes import random_multipolygon
+
+
+# ------------------------------------------------
+#  REFERANS: ilk sürümdeki satır satır kesişim döngüsü
+# ------------------------------------------------
+def reference_spans(geom, angle_deg, step, center, diag):
+    dx, dy = math.cos(math.radians(angle_deg)), math.sin(math.radians(angle_deg))
+    nx, ny = -dy, dx
+    spans = []
+    for i in range(-int(diag), int(diag), step):
+        cx, cy = nx * i + center[0], ny * i + center[1]
+        inter = geom.intersection(LineString([(cx - dx * diag, cy - dy * diag), (cx + dx * diag, cy + dy * diag)]))
+        for part in shapely.get_parts(inter):
+            if part.geom_type == "LineString" and not part.is_empty:
+                pts = shapely.get_coordinates(part)
+                spans.append((pts[0], pts[-1]))
+    return np.array(spans, dtype=float).reshape(-1, 2, 2)
+
+
+def canonical(spans):
+    # Uçları yönden bağımsız sırala, sonra parçaları sırala
+    s = spans.copy()
+    flip = (s[:, 0, 0] > s[:, 1, 0]) | ((s[:, 0, 0] == s[:, 1, 0]) & (s[:, 0, 1] > s[:, 1, 1]))
+    s[flip] = s[flip][:, ::-1]
+    s = s.reshape(-1, 4)
+    return s[np.lexsort(np.round(s, 4).T[::-1])]
+
+
+@pytest.mark.parametrize("seed", range(8))
+@pytest.mark.parametrize("angle", [45.0, 135.0, 0.0, 90.0, 17.0])
+def test_hatch_spans_matches_intersection(seed, angle):
+    geom = random_multipolygon(np.random.default_rng(seed))
+    x0, y0, x1, y1 = geom.bounds
+    center = ((x1 + 2) / 2, (y1 + 2) / 2)
+    diag = math.hypot(x1 + 2, y1 + 2)
+    step = 5
+
+    got = hatch_spans(geom, angle, step, center, diag)
+    ref = reference_spans(geom, angle, step, center, diag)
+    assert got.shape == ref.shape
+    np.testing.assert_allclose(canonical(got), canonical(ref), atol=1e-6)
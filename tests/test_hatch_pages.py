@@ -0,0 +1,49 @@
+import fitz
+import numpy as np
+import pytest
+
+from pages.convert_pdf import KnifeTraceNotFound, hatch_pages
+
+CONFIGS = [{"TARAMA_ACISI_DERECE": 45, "yon": 2}, {"TARAMA_ACISI_DERECE": 135, "yon": 1}]
+
+
+def knife_pdf(pages):
+    # pages: sayfa başına bıçak dikdörtgenleri; boş liste → bıçak izi olmayan sayfa
+    doc = fitz.open()
+    for rects in pages:
+        page = doc.new_page(width=600, height=800)
+        page.insert_text((50, 50), "kapak")
+        for x0, y0, x1, y1 in rects:
+            shape = page.new_shape()
+            P = fitz.Point
+            # Üst kenarda ara nokta: get_drawings "re" yerine "l" öğeleri üretir
+            shape.draw_polyline([P(x0, y0), P((x0 + x1) / 2, y0), P(x1, y0), P(x1, y1), P(x0, y1), P(x0, y0)])
+            shape.finish(color=(1, 0, 0), width=2.83)
+            shape.commit()
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def test_hatch_pages_skips_empty_pages_and_splits_shapes():
+    data = knife_pdf([[], [(50, 50, 200, 150), (300, 50, 450, 200)], [(50, 50, 300, 250)]])
+    serial = hatch_pages(data, CONFIGS, tarama_araligi=6, max_workers=1)
+    assert [(page, k) for page, k, _, _ in serial] == [(1, 0), (1, 1), (2, 0)]
+    pooled = hatch_pages(data, CONFIGS, tarama_araligi=6, max_workers=3)
+    assert [(page, k) for page, k, _, _ in pooled] == [(1, 0), (1, 1), (2, 0)]
+    for (_, _, _, a), (_, _, _, b) in zip(serial, pooled):
+        assert len(a) == len(CONFIGS)
+        for sa, sb in zip(a, b):
+            assert len(sa)
+            np.testing.assert_array_equal(sa, sb)
+
+
+def test_hatch_pages_without_knife_raises():
+    with pytest.raises(KnifeTraceNotFound, match="2 sayfa"):
+        hatch_pages(knife_pdf([[], []]), CONFIGS, max_workers=1)
+
+
+def test_hatch_pages_surfaces_other_errors():
+    # Bıçak izi eksikliği dışındaki hatalar sayfayı sessizce atlamaz
+    with pytest.raises(IndexError):
+        hatch_pages(knife_pdf([[(50, 50, 200, 150)]]), CONFIGS, pages=[0, 5], max_workers=2)
@@ -0,0 +1,52 @@
+import threading
+
+import numpy as np
+import pytest
+from shapely import affinity
+
+from pages.convert_pdf import DieLineGeometry, ProcessCancelled, ProcessStats, _hatch_configs, compute_hatch
+from shapes import random_multipolygon
+
+
+def geometry(seed=0):
+    # Birkaç tarama parçasına (HATCH_CHUNK_LINES) bölünecek kadar büyük
+    geom = affinity.scale(random_multipolygon(np.random.default_rng(seed)), 10, 10, origin=(0, 0))
+    return DieLineGeometry(poly_to_hatch=geom, final_rect=geom.bounds)
+
+
+@pytest.mark.parametrize("hatch_workers", [None, 3])
+def test_watched_hatch_matches_single_pass(hatch_workers):
+    geo = geometry()
+    single = compute_hatch(geo, 2, 45.0)
+    events = []
+    stats = ProcessStats(progress=events.append, cancel=threading.Event())
+    watched = compute_hatch(geo, 2, 45.0, stats, hatch_workers)
+    np.testing.assert_array_equal(single, watched)
+    assert sum(ev.kind == "chunk" for ev in events) > 1
+
+
+def test_fraction_monotonic_with_parallel_angles():
+    events = []
+    stats = ProcessStats(progress=events.append)
+    configs = [{"TARAMA_ACISI_DERECE": 45, "yon": 2}, {"TARAMA_ACISI_DERECE": 135, "yon": 1}]
+    _hatch_configs(geometry(1), configs, 2, stats=stats, hatch_workers=2)
+    fractions = [ev.fraction for ev in events]
+    assert fractions == sorted(fractions)
+    chunks = [ev for ev in events if ev.kind == "chunk"]
+    assert chunks[-1].oran == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("hatch_workers", [None, 3])
+def test_cancel_during_hatch(hatch_workers):
+    cancel = threading.Event()
+    chunks = []
+
+    def progress(ev):
+        if ev.kind == "chunk":
+            chunks.append(ev)
+            cancel.set()
+
+    stats = ProcessStats(progress=progress, cancel=cancel)
+    with pytest.raises(ProcessCancelled):
+        compute_hatch(geometry(), 2, 45.0, stats, hatch_workers)
+    assert len(chunks) == 1
@@ -0,0 +1,18 @@
+import math
+
+import numpy as np
+import pytest
+
+from hatch_scanline import hatch_spans, hatch_spans_tiled
+from shapes import random_multipolygon
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("workers,strips", [(2, None), (4, 7), (3, 16)])
+def test_hatch_spans_tiled_identical(seed, workers, strips):
+    geom = random_multipolygon(np.random.default_rng(100 + seed))
+    x0, y0, x1, y1 = geom.bounds
+    center, diag = ((x1 + 2) / 2, (y1 + 2) / 2), math.hypot(x1 + 2, y1 + 2)
+    single = hatch_spans(geom, 45.0, 3, center, diag)
+    tiled = hatch_spans_tiled(geom, 45.0, 3, center, diag, workers=workers, strips=strips)
+    np.testing.assert_array_equal(single, tiled)
@@ -0,0 +1,74 @@
+import fitz
+import pytest
+
+from pdf_boxes import find_pdf_boxes
+
+
+def make_pdf(content: str, w: float = 1000, h: float = 1000) -> bytes:
+    doc = fitz.open()
+    page = doc.new_page(width=w, height=h)
+    xref = doc.get_new_xref()
+    doc.update_object(xref, "<<>>")
+    doc.update_stream(xref, content.encode())
+    doc.xref_set_key(page.xref, "Contents", f"{xref} 0 R")
+    return doc.tobytes()
+
+
+CASES = {
+    # Kontur çizilmiş 400x400 çerçeve: re, h ile kapanan yol, açıkça kapanan yol
+    "frame_re": "0 0 0 RG 4 w 100 500 400 400 re S",
+    "frame_h": "0 0 0 RG 4 w 100 500 m 500 500 l 500 900 l 100 900 l h S",
+    "curve_h": "0 0 0 RG 5 w 100 500 m 100 900 500 900 500 500 c 500 300 l h S",
+    # Kırpma altında tam sayfa dolgu + ayrı 300x300 dolgu (iç içe kırpma dahil)
+    "clip": "q 100 100 400 400 re W n 0 0 1 rg 0 0 1000 1000 re f Q 1 0 0 rg 600 600 300 300 re f",
+    "clip_nested": "q 100 100 400 400 re W n q 50 50 200 200 re W n 0 1 0 rg 0 0 1000 1000 re f Q "
+                   "0 0 1 rg 0 0 1000 1000 re f Q 1 0 0 rg 600 600 300 300 re f",
+}
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_vector_matches_raster(name):
+    data = make_pdf(CASES[name])
+    raster = find_pdf_boxes(data, method="raster", workers=1)[0]
+    vector = find_pdf_boxes(data, method="vector", workers=1)[0]
+    assert raster
+    assert len(vector) == len(raster)
+    for r, v in zip(raster, vector):
+        assert max(abs(a - b) for a, b in zip(r, v)) < 2
+
+
+def test_unknown_method_rejected():
+    data = make_pdf(CASES["frame_re"])
+    with pytest.raises(ValueError, match="Bilinmeyen"):
+        find_pdf_boxes(data, method="vektor", workers=1)
+
+
+def step_and_repeat_pdf() -> bytes:
+    # Geniş sayfada ayrık ambalaj bölgeleri: dolgu, kontur çerçeve, metin, kenara değen şekil
+    doc = fitz.open()
+    page = doc.new_page(width=2400, height=1700)
+    for i in range(3):
+        for j in range(2):
+            x, y = 60 + i * 780, 60 + j * 820
+            page.draw_rect(fitz.Rect(x, y, x + 600, y + 500), color=(0, 0, 0), width=3)
+            page.draw_rect(fitz.Rect(x + 40, y + 40, x + 300, y + 260), fill=(0.2, 0.4, 0.8))
+            page.draw_circle(fitz.Point(x + 450, y + 380), 80, fill=(0.9, 0.1, 0.1))
+            page.insert_text(fitz.Point(x + 40, y + 470), "ambalaj", fontsize=40)
+    page.draw_rect(fitz.Rect(2250, 0, 2400, 400), fill=(0, 0, 0))
+    page.draw_rect(fitz.Rect(1000, 1450, 1500, 1700), fill=(0.5, 0.5, 0))
+    return doc.tobytes()
+
+
+# 6 MB: her bölge tam DPI'da sığar ama şeritlere bölünerek render edilir
+@pytest.mark.parametrize("memory_mb", [64, 6])
+def test_coarse_to_fine_matches_single_pass(monkeypatch, memory_mb):
+    import pdf_boxes
+
+    doc = fitz.open(stream=step_and_repeat_pdf(), filetype="pdf")
+    page = doc[0]
+    single = pdf_boxes.raster_page_boxes(page, memory_mb=1024, coarse_dpi=None)
+    assert len(single) == 7  # kenardaki dar blok MIN_W altında
+    # Her sayfa kaba-ince yoldan geçsin
+    monkeypatch.setattr(pdf_boxes, "COARSE_MIN_PX", 0)
+    tiled = pdf_boxes.raster_page_boxes(page, memory_mb=memory_mb)
+    assert [tuple(r) for r in tiled] == [tuple(r) for r in single]
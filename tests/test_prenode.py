@@ -0,0 +1,48 @@
+import math
+
+import numpy as np
+import pytest
+import shapely
+from shapely.ops import unary_union
+
+from pages.convert_pdf import prenode_segments
+
+
+def test_prenode_drops_degenerate_and_reversed_duplicates():
+    segs = np.array([
+        [(0, 0), (10, 0)],
+        [(10, 0), (0, 0)],          # ters yönde tekrar
+        [(0, 0), (10, 0)],          # birebir tekrar
+        [(5, 5), (5, 5)],           # sıfır uzunluk
+        [(5, 5), (5.0004, 5.0004)],  # ızgarada sıfıra iner
+        [(0, 0), (0, 10)],
+    ], dtype=float)
+    out, report = prenode_segments(segs)
+    assert report == {"girdi": 6, "dejenere": 2, "tekrar": 2, "dogrudas": 0, "cikti": 2}
+    assert len(out) == 2
+
+
+def test_prenode_merges_collinear_overlaps_but_keeps_gaps():
+    segs = np.array([
+        [(0, 0), (6, 0)],
+        [(4, 0), (10, 0)],          # üst üste biner → birleşir
+        [(10, 0), (12, 0)],         # uç uca → birleşir
+        [(15, 0), (20, 0)],         # boşluk var → ayrı kalır
+        [(0, 1), (5, 1)],           # paralel ama farklı doğru
+        [(0, 0), (3, 3)],
+        [(3, 3), (6, 6)],           # çapraz uç uca → birleşir
+    ], dtype=float)
+    out, report = prenode_segments(segs)
+    assert report["dogrudas"] == 3
+    assert report["cikti"] == 4
+    lengths = sorted(np.round(np.hypot(*(out[:, 1] - out[:, 0]).T), 6))
+    assert lengths == sorted([12.0, 5.0, 5.0, round(math.hypot(6, 6), 6)])
+    # Birleşmiş kenarlar aynı yüzleri verir
+    assert unary_union(shapely.linestrings(out)).length == pytest.approx(
+        unary_union(shapely.linestrings(segs)).length)
+
+
+def test_prenode_empty():
+    out, report = prenode_segments(np.empty((0, 2, 2)))
+    assert out.shape == (0, 2, 2)
+    assert report["cikti"] == 0